@@ -7,7 +7,7 @@ import streamlit as st
 from datetime import datetime
 import time
 
-from config.theme import apply_theme
+from config.theme import apply_theme, apply_deferred_theme
 from utils.data_loader import load_and_validate_data
 from models.forecasting import ForecastingEngine
 from models.anomaly import detect_anomalies_advanced
@@ -41,13 +41,14 @@ def main():
     render_header()
 
     config = render_sidebar()
+    apply_deferred_theme()
 
     # Guard: if data didn't load, stop here
     if not config.get('data_loaded', False):
         return
 
     df = config['df']
-    product_data = df[df['product_id'] == config['selected_product']].copy()
+    product_data = df.iloc[config['product_groups'][config['selected_product']]]
 
     if len(product_data) < 14:
         st.error("❌ **Insufficient Data**: Minimum 14 days of history required for accurate forecasting")
@@ -63,7 +64,31 @@ def main():
 
     # Otherwise show welcome
     if not st.session_state.analysis_done:
-        render_welcome_screen(df, config['products'])
+        render_welcome_screen(df, config['products'], config['product_groups'])
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def cached_forecast(product_data, forecast_days):
+    """Ensemble forecast for one product, memoized on its sales history"""
+    return ForecastingEngine(product_data).ensemble_forecast(forecast_days)
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def cached_accuracy(product_data):
+    """Walk-forward accuracy for one product, memoized on its sales history"""
+    return ForecastingEngine(product_data).calculate_accuracy()
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def cached_anomalies(product_data):
+    """Anomaly detection for one product, memoized on its sales history"""
+    return detect_anomalies_advanced(product_data)
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def cached_insights(product_data, forecast_values, anomaly_df, inventory, accuracy):
+    """Business insights for one analysis, memoized on its inputs"""
+    return generate_insights(product_data, forecast_values, anomaly_df, inventory, accuracy)
 
 
 def run_analysis(product_data, config, df):
@@ -71,21 +96,19 @@ def run_analysis(product_data, config, df):
     status_text = st.empty()
 
     try:
-        status_text.text("🔧 Initializing AI forecasting engine...")
-        progress_bar.progress(20)
-        engine = ForecastingEngine(product_data)
-
         status_text.text("🔮 Generating ensemble predictions...")
         progress_bar.progress(40)
-        forecast_dates, forecast_values, confidences = engine.ensemble_forecast(config['forecast_days'])
+        forecast_dates, forecast_values, confidences = cached_forecast(product_data, config['forecast_days'])
 
         status_text.text("🔍 Detecting anomalies...")
         progress_bar.progress(60)
-        anomaly_df = detect_anomalies_advanced(product_data)
+        anomaly_df = cached_anomalies(product_data)
+        anomaly_mask = anomaly_df['is_anomaly'].to_numpy()
+        anomaly_count = int(anomaly_mask.sum())
 
         status_text.text("📊 Calculating model accuracy...")
         progress_bar.progress(75)
-        accuracy = engine.calculate_accuracy()
+        accuracy = cached_accuracy(product_data)
 
         status_text.text("🎯 Optimizing inventory levels...")
         progress_bar.progress(90)
@@ -100,7 +123,7 @@ def run_analysis(product_data, config, df):
 
         status_text.text("💡 Generating business insights...")
         progress_bar.progress(95)
-        insights = generate_insights(product_data, forecast_values, anomaly_df, inventory, accuracy)
+        insights = cached_insights(product_data, forecast_values, anomaly_df, inventory, accuracy)
 
         progress_bar.progress(100)
         status_text.text("✅ Analysis complete!")
@@ -116,6 +139,8 @@ def run_analysis(product_data, config, df):
             "forecast_values": forecast_values,
             "confidences": confidences,
             "anomaly_df": anomaly_df,
+            "anomaly_mask": anomaly_mask,
+            "anomaly_count": anomaly_count,
             "inventory": inventory,
             "insights": insights,
             "accuracy": accuracy,
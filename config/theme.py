@@ -4,9 +4,46 @@ Theme configuration — loads CSS from assets/ and manages dark/light toggle
 
 import streamlit as st
 import os
+import re
 
 ASSETS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets")
 
+# Linked from the page instead of @import-ed from the stylesheet, so the font
+# CSS fetch is not chained behind parsing the theme; only weights in use
+_FONT_LINKS = (
+    '<link rel="preconnect" href="https://fonts.googleapis.com">'
+    '<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>'
+    '<link rel="stylesheet" href="https://fonts.googleapis.com/css2?family=Inter:'
+    'wght@400;500;600;700;800;900&display=swap">'
+)
+
+# Rules after this marker are not needed for the header and sidebar shell
+_DEFERRED_MARKER = re.compile(r"/\*\s*@deferred\b.*?\*/", re.S)
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_CSS_SPACE = re.compile(r"\s+")
+_CSS_PUNCT = re.compile(r"\s*([{};,>])\s*")
+
+
+def minify_css(css):
+    """
+    Strip comments and redundant whitespace from a stylesheet
+
+    Only whitespace that is never significant is removed (around braces,
+    semicolons, commas, child combinators and after property colons), so
+    selectors such as "a :hover" keep their meaning.
+
+    Args:
+        css: Stylesheet source
+
+    Returns:
+        Minified stylesheet string
+    """
+    css = _CSS_COMMENT.sub("", css)
+    css = _CSS_SPACE.sub(" ", css)
+    css = _CSS_PUNCT.sub(r"\1", css)
+    css = css.replace(": ", ":").replace(";}", "}")
+    return css.strip()
+
 
 def get_current_theme():
     """Get the current theme from session state, default to dark"""
@@ -15,23 +52,60 @@ def get_current_theme():
     return st.session_state.app_theme
 
 
-def apply_theme():
-    """Load and apply the selected CSS theme"""
-    theme = get_current_theme()
+def _theme_css_file():
+    """Path of the stylesheet for the selected theme"""
+    if get_current_theme() == "🌙 Dark":
+        return os.path.join(ASSETS_DIR, "styles.css")
+    return os.path.join(ASSETS_DIR, "styles_light.css")
+
 
-    if theme == "🌙 Dark":
-        css_file = os.path.join(ASSETS_DIR, "styles.css")
-    else:
-        css_file = os.path.join(ASSETS_DIR, "styles_light.css")
+@st.cache_resource(show_spinner=False)
+def get_theme_css(css_file):
+    """
+    Read and minify a theme stylesheet once per process
 
+    The stylesheet is split at its @deferred marker into the critical part
+    needed to paint the header and sidebar and the remaining rules. Order is
+    preserved, so emitting the two parts in sequence keeps the cascade.
+
+    Args:
+        css_file: Path to the CSS file under assets/
+
+    Returns:
+        Tuple of (critical, deferred) markup strings; the critical one also
+        links the Inter font
+    """
+    with open(css_file, "r", encoding="utf-8") as f:
+        css = f.read()
+    critical, *rest = _DEFERRED_MARKER.split(css, maxsplit=1)
+    deferred = rest[0] if rest else ""
+    return (
+        f"{_FONT_LINKS}<style>{minify_css(critical)}</style>",
+        f"<style>{minify_css(deferred)}</style>" if deferred else "",
+    )
+
+
+def apply_theme():
+    """Apply the critical part of the selected CSS theme"""
     try:
-        with open(css_file, "r", encoding="utf-8") as f:
-            css = f.read()
-        st.markdown(f"<style>{css}</style>", unsafe_allow_html=True)
+        critical, _ = get_theme_css(_theme_css_file())
+        st.markdown(critical, unsafe_allow_html=True)
     except FileNotFoundError:
         st.warning("⚠️ Theme file not found. Using default Streamlit theme.")
 
 
+def apply_deferred_theme():
+    """Apply the rest of the selected CSS theme once the page shell is out"""
+    try:
+        _, deferred = get_theme_css(_theme_css_file())
+    except FileNotFoundError:
+        return  # apply_theme() has already warned
+    if deferred:
+        # Style-only st.html goes to the event container, so no gap is added
+        # below the elements already rendered
+        st.html(deferred)
+
+
 def is_dark_theme():
     """Check if the current theme is dark"""
     return get_current_theme() == "🌙 Dark"
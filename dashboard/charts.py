@@ -2,28 +2,180 @@
 Chart and visualization generation module
 """
 
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import pandas as pd
+import functools
+from types import MappingProxyType
 import numpy as np
 from config.theme import is_dark_theme
 
 
-def create_dashboard(historical_df, forecast_dates, forecast_values, confidences, anomaly_df):
+@functools.lru_cache(maxsize=None)
+def get_plotly():
     """
-    Create comprehensive visualization dashboard with dark-mode styling
+    Import plotly.graph_objects on first use
 
-    Args:
-        historical_df: Historical sales data
-        forecast_dates: List of forecast dates
-        forecast_values: List of forecast values
-        confidences: List of confidence intervals
-        anomaly_df: DataFrame with anomaly detection results
+    Plotly is the heaviest import in the app; loading it only when a chart is
+    drawn lets the header and sidebar render first on a cold start.
 
     Returns:
-        Plotly figure object
+        The plotly.graph_objects module
+    """
+    import plotly.graph_objects as go
+    return go
+
+
+# Theme-aware colors, keyed by is_dark_theme(); read-only so the shared
+# palettes cannot be changed by one dashboard for the next
+COLORS = MappingProxyType({
+    True: MappingProxyType({
+        'historical': '#667eea',
+        'anomaly': '#f87171',
+        'forecast': '#34d399',
+        'confidence': 'rgba(52, 211, 153, 0.12)',
+        'weekly': '#fbbf24',
+        'inventory': '#a78bfa',
+        'text': '#a0aec0',
+        'text_light': '#8898b9',
+        'grid': 'rgba(100, 126, 234, 0.08)',
+        'bar_inactive': 'rgba(100, 126, 234, 0.25)',
+        'anomaly_bar_bg': 'rgba(100, 126, 234, 0.25)',
+        'fill_inv': 'rgba(167, 139, 250, 0.08)',
+        'title': '#e2e8f0',
+        'subtitle': '#c8d2e6',
+        'legend_bg': 'rgba(15, 20, 40, 0.7)',
+        'legend_border': 'rgba(100, 126, 234, 0.15)',
+        'plot_bg': 'rgba(15, 20, 40, 0.3)',
+    }),
+    False: MappingProxyType({
+        'historical': '#7c3aed',
+        'anomaly': '#e11d48',
+        'forecast': '#059669',
+        'confidence': 'rgba(5, 150, 105, 0.1)',
+        'weekly': '#d97706',
+        'inventory': '#7c3aed',
+        'text': '#4a2040',
+        'text_light': '#6b3a5e',
+        'grid': 'rgba(236, 72, 153, 0.08)',
+        'bar_inactive': 'rgba(236, 72, 153, 0.2)',
+        'anomaly_bar_bg': 'rgba(236, 72, 153, 0.15)',
+        'fill_inv': 'rgba(124, 58, 237, 0.06)',
+        'title': '#1e1b2e',
+        'subtitle': '#4a2040',
+        'legend_bg': 'rgba(255, 255, 255, 0.7)',
+        'legend_border': 'rgba(236, 72, 153, 0.1)',
+        'plot_bg': 'rgba(253, 242, 248, 0.2)',
+    }),
+})
+
+
+# Hover text of each dashboard trace, shared by both themes
+HOVER_TEMPLATES = MappingProxyType({
+    'historical': '<b>%{x}</b><br>Sales: %{y} units<extra></extra>',
+    'anomaly': '<b>ANOMALY</b><br>Date: %{x}<br>Sales: %{y} units<extra></extra>',
+    'forecast': '<b>FORECAST</b><br>%{x}<br>Predicted: %{y} units<extra></extra>',
+    'severity': '<b>%{x}</b><br>Severity: %{y:.2f}<extra></extra>',
+    'weekly': '<b>%{x}</b><br>Avg Sales: %{y:.1f} units<extra></extra>',
+    'inventory': '<b>%{x}</b><br>Total Demand: %{y:.0f} units<extra></extra>',
+})
+
+
+def _trace_styles(dark):
+    """Build the line, marker and text styles of the dashboard traces for one theme"""
+    colors = COLORS[dark]
+    return MappingProxyType({
+        'historical_line': dict(color=colors['historical'], width=2.5),
+        'anomaly_marker': dict(
+            color=colors['anomaly'],
+            size=10,
+            symbol='x',
+            line=dict(width=2, color='rgba(248, 113, 113, 0.5)')
+        ),
+        'forecast_line': dict(color=colors['forecast'], width=3, dash='dash'),
+        'forecast_marker': dict(size=7, symbol='diamond', color=colors['forecast']),
+        'band_line': dict(color='rgba(255,255,255,0)'),
+        'weekly_text': dict(color=colors['text'], size=11),
+        'inventory_line': dict(color=colors['inventory'], width=3),
+        'inventory_marker': dict(size=7, color=colors['inventory']),
+    })
+
+
+# Built once at import; the Figure constructor copies them, so every
+# dashboard can share the same objects
+TRACE_STYLES = MappingProxyType({dark: _trace_styles(dark) for dark in (True, False)})
+
+
+@functools.lru_cache(maxsize=None)
+def _register_template(dark):
+    """
+    Register the app's axis defaults for one theme as a Plotly template (once)
+
+    Template axis defaults apply to every subplot axis, so the grid and tick
+    styling is stated once instead of being written onto all eight axes.
+
+    Returns:
+        Template name, to be combined with the base Plotly template
     """
+    import plotly.io as pio
+    go = get_plotly()
+    colors = COLORS[dark]
+    axis_style = dict(
+        showgrid=True,
+        gridwidth=1,
+        gridcolor=colors['grid'],
+        tickfont=dict(color=colors['text_light']),
+        title_font=dict(color=colors['text']),
+        zeroline=False
+    )
+    name = 'sia_dark' if dark else 'sia_light'
+    pio.templates[name] = go.layout.Template(layout=dict(xaxis=axis_style, yaxis=axis_style))
+    return name
+
+
+def _base_layout(dark):
+    """Build the static dashboard layout for one theme"""
+    colors = COLORS[dark]
+    return dict(
+        height=900,
+        showlegend=True,
+        template=('plotly_dark+' if dark else 'plotly_white+') + _register_template(dark),
+        font=dict(family="Inter, sans-serif", size=12, color=colors['text']),
+        title=dict(
+            text="<b>AI-Powered Inventory Intelligence Dashboard</b>",
+            x=0.5,
+            xanchor='center',
+            font=dict(size=22, color=colors['title'])
+        ),
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1,
+            bgcolor=colors['legend_bg'],
+            bordercolor=colors['legend_border'],
+            borderwidth=1,
+            font=dict(color=colors['text'])
+        ),
+        hovermode='x unified',
+        # Keep zoom and legend toggles across reruns with new data
+        uirevision='dashboard',
+        plot_bgcolor=colors['plot_bg'],
+        paper_bgcolor='rgba(0, 0, 0, 0)',
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _layout_skeleton(dark):
+    """
+    Build the complete 2x2 dashboard layout for one theme
+
+    Runs make_subplots once per theme (cached), so each dashboard only has to
+    attach its traces to the fixed x/x2/x3/x4 axis pairs.
+    """
+    from plotly.subplots import make_subplots
+    go = get_plotly()
+    colors = COLORS[dark]
     fig = make_subplots(
+        figure=go.Figure(layout=_base_layout(dark)),
         rows=2, cols=2,
         subplot_titles=('📊 Sales History & AI Forecast', '🔍 Anomaly Detection Timeline',
                        '📅 Weekly Demand Pattern', '📦 Inventory Projection'),
@@ -33,197 +185,179 @@ def create_dashboard(historical_df, forecast_dates, forecast_values, confidences
         horizontal_spacing=0.1
     )
 
-    # Theme-aware colors
-    dark = is_dark_theme()
-
-    colors = {
-        'historical': '#667eea' if dark else '#7c3aed',
-        'anomaly': '#f87171' if dark else '#e11d48',
-        'forecast': '#34d399' if dark else '#059669',
-        'confidence': 'rgba(52, 211, 153, 0.12)' if dark else 'rgba(5, 150, 105, 0.1)',
-        'weekly': '#fbbf24' if dark else '#d97706',
-        'inventory': '#a78bfa' if dark else '#7c3aed',
-        'text': '#a0aec0' if dark else '#4a2040',
-        'text_light': '#8898b9' if dark else '#6b3a5e',
-        'grid': 'rgba(100, 126, 234, 0.08)' if dark else 'rgba(236, 72, 153, 0.08)',
-        'bar_inactive': 'rgba(100, 126, 234, 0.25)' if dark else 'rgba(236, 72, 153, 0.2)',
-        'anomaly_bar_bg': 'rgba(100, 126, 234, 0.25)' if dark else 'rgba(236, 72, 153, 0.15)',
-        'fill_inv': 'rgba(167, 139, 250, 0.08)' if dark else 'rgba(124, 58, 237, 0.06)',
-    }
+    # Subplot title colors (axis styling comes from the app template)
+    for annotation in fig.layout.annotations:
+        annotation.font.color = colors['subtitle']
+
+    return fig.layout.to_plotly_json()
+
+
+# Line traces longer than this render through WebGL (scattergl); shorter
+# ones stay on SVG, which is sharper and does not take a WebGL context
+WEBGL_MIN_POINTS = 2000
+
+
+def _line_type(n_points):
+    """Plotly trace type for a line series of n_points"""
+    return 'scattergl' if n_points > WEBGL_MIN_POINTS else 'scatter'
+
+
+# Axis pair of each subplot cell, as make_subplots numbers them
+_CELL_AXES = {
+    (1, 1): dict(xaxis='x', yaxis='y'),
+    (1, 2): dict(xaxis='x2', yaxis='y2'),
+    (2, 1): dict(xaxis='x3', yaxis='y3'),
+    (2, 2): dict(xaxis='x4', yaxis='y4'),
+}
+
+
+def create_dashboard(historical_df, forecast_dates, forecast_values, confidences, anomaly_df,
+                     anomaly_mask=None, dark=None):
+    """
+    Create comprehensive visualization dashboard with dark-mode styling
+
+    Args:
+        historical_df: Historical sales data with an int8 'day_of_week' column
+        forecast_dates: DatetimeIndex of forecast dates
+        forecast_values: List of forecast values
+        confidences: List of confidence intervals
+        anomaly_df: DataFrame with anomaly detection results
+        anomaly_mask: Optional precomputed boolean ndarray of anomaly_df['is_anomaly']
+        dark: Optional theme flag; defaults to is_dark_theme()
+
+    Returns:
+        Plotly figure object
+    """
+    # Theme-aware colors and layout
+    if dark is None:
+        dark = is_dark_theme()
+    colors = COLORS[dark]
+    styles = TRACE_STYLES[dark]
+    traces = []
+
+    if anomaly_mask is None:
+        anomaly_mask = anomaly_df['is_anomaly'].to_numpy()
+    normal_idx = np.flatnonzero(~anomaly_mask)
+    anomaly_idx = np.flatnonzero(anomaly_mask)
+
+    values = np.asarray(forecast_values, dtype=np.float64)
+    bands = np.asarray(confidences, dtype=np.float64)
+    # Plotted series go out as float32 typed arrays, half the bytes of float64;
+    # sales are already int32 from the loader
+    plot_dtype = np.float32
+    has_forecast = len(values) > 0
 
     # 1. Main Chart: Historical + Forecast
-    normal_data = anomaly_df[~anomaly_df['is_anomaly']]
-    fig.add_trace(
-        go.Scatter(
-            x=normal_data['date'],
-            y=normal_data['units_sold'],
+    normal_data = anomaly_df.iloc[normal_idx]
+    if len(normal_data) > 0:
+        traces.append(dict(
+            type=_line_type(len(normal_data)),
+            x=normal_data['date'].to_numpy(),
+            y=normal_data['units_sold'].to_numpy(),
             mode='lines',
             name='Historical Sales',
-            line=dict(color=colors['historical'], width=2.5),
-            hovertemplate='<b>%{x}</b><br>Sales: %{y} units<extra></extra>'
-        ),
-        row=1, col=1
-    )
+            line=styles['historical_line'],
+            hovertemplate=HOVER_TEMPLATES['historical'],
+            **_CELL_AXES[1, 1]
+        ))
 
     # Add anomalies
-    anomaly_data = anomaly_df[anomaly_df['is_anomaly']]
+    anomaly_data = anomaly_df.iloc[anomaly_idx]
     if len(anomaly_data) > 0:
-        fig.add_trace(
-            go.Scatter(
-                x=anomaly_data['date'],
-                y=anomaly_data['units_sold'],
-                mode='markers',
-                name='Anomalies',
-                marker=dict(
-                    color=colors['anomaly'],
-                    size=10,
-                    symbol='x',
-                    line=dict(width=2, color='rgba(248, 113, 113, 0.5)')
-                ),
-                hovertemplate='<b>ANOMALY</b><br>Date: %{x}<br>Sales: %{y} units<extra></extra>'
-            ),
-            row=1, col=1
-        )
-
-    # Add forecast
-    fig.add_trace(
-        go.Scatter(
+        traces.append(dict(
+            type='scatter',
+            x=anomaly_data['date'].to_numpy(),
+            y=anomaly_data['units_sold'].to_numpy(),
+            mode='markers',
+            name='Anomalies',
+            marker=styles['anomaly_marker'],
+            hovertemplate=HOVER_TEMPLATES['anomaly'],
+            **_CELL_AXES[1, 1]
+        ))
+
+    # Forecast and its confidence band, skipped for an empty horizon
+    if has_forecast:
+        # Add forecast
+        traces.append(dict(
+            type='scatter',
             x=forecast_dates,
-            y=forecast_values,
+            y=values.astype(plot_dtype),
             mode='lines+markers',
             name='AI Forecast',
-            line=dict(color=colors['forecast'], width=3, dash='dash'),
-            marker=dict(size=7, symbol='diamond', color=colors['forecast']),
-            hovertemplate='<b>FORECAST</b><br>%{x}<br>Predicted: %{y} units<extra></extra>'
-        ),
-        row=1, col=1
-    )
+            line=styles['forecast_line'],
+            marker=styles['forecast_marker'],
+            hovertemplate=HOVER_TEMPLATES['forecast'],
+            **_CELL_AXES[1, 1]
+        ))
 
-    # Confidence interval
-    upper = [f + c for f, c in zip(forecast_values, confidences)]
-    lower = [max(0, f - c) for f, c in zip(forecast_values, confidences)]
-    fig.add_trace(
-        go.Scatter(
-            x=forecast_dates + forecast_dates[::-1],
-            y=upper + lower[::-1],
+        # Confidence interval, as one closed polygon
+        dates = np.asarray(forecast_dates)
+        upper = values + bands
+        lower = np.maximum(0.0, values - bands)
+        traces.append(dict(
+            type='scatter',
+            x=np.concatenate([dates, dates[::-1]]),
+            y=np.concatenate([upper, lower[::-1]]).astype(plot_dtype),
             fill='toself',
             fillcolor=colors['confidence'],
-            line=dict(color='rgba(255,255,255,0)'),
+            line=styles['band_line'],
             name='95% Confidence',
             showlegend=True,
-            hoverinfo='skip'
-        ),
-        row=1, col=1
-    )
+            hoverinfo='skip',
+            **_CELL_AXES[1, 1]
+        ))
 
     # 2. Anomaly Timeline
-    anomaly_colors = [colors['anomaly'] if x else colors['anomaly_bar_bg'] for x in anomaly_df['is_anomaly']]
-    fig.add_trace(
-        go.Bar(
-            x=anomaly_df['date'],
-            y=anomaly_df['anomaly_severity'],
-            marker_color=anomaly_colors,
-            name='Anomaly Score',
-            hovertemplate='<b>%{x}</b><br>Severity: %{y:.2f}<extra></extra>'
-        ),
-        row=1, col=2
-    )
+    # A NumPy string array would push plotly's JSON encoder off its fast path
+    anomaly_colors = np.where(anomaly_mask, colors['anomaly'], colors['anomaly_bar_bg']).tolist()
+    traces.append(dict(
+        type='bar',
+        x=anomaly_df['date'].to_numpy(),
+        y=anomaly_df['anomaly_severity'].to_numpy(dtype=plot_dtype),
+        marker=dict(color=anomaly_colors),
+        name='Anomaly Score',
+        hovertemplate=HOVER_TEMPLATES['severity'],
+        **_CELL_AXES[1, 2]
+    ))
 
-    # 3. Weekly Pattern (using a copy to avoid mutation)
-    hist_copy = historical_df.copy()
-    hist_copy['day_of_week'] = pd.to_datetime(hist_copy['date']).dt.dayofweek
-    weekly = hist_copy.groupby('day_of_week')['units_sold'].mean()
+    # 3. Weekly Pattern (day_of_week is precomputed by the loader)
+    dow = historical_df['day_of_week'].to_numpy(dtype=np.intp)
+    sales = historical_df['units_sold'].to_numpy(dtype=np.float64)
+    weekly = np.bincount(dow, weights=sales, minlength=7) / np.maximum(np.bincount(dow, minlength=7), 1)
+    peak_day = int(weekly.argmax())
     days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
 
-    bar_colors = [colors['weekly'] if i == weekly.idxmax() else colors['bar_inactive'] for i in range(7)]
-
-    fig.add_trace(
-        go.Bar(
-            x=days,
-            y=weekly.values,
-            marker_color=bar_colors,
-            name='Weekly Pattern',
-            text=[f'{v:.0f}' for v in weekly.values],
-            textposition='outside',
-            textfont=dict(color=colors['text'], size=11),
-            hovertemplate='<b>%{x}</b><br>Avg Sales: %{y:.1f} units<extra></extra>'
-        ),
-        row=2, col=1
-    )
+    bar_colors = [colors['weekly'] if i == peak_day else colors['bar_inactive'] for i in range(7)]
+
+    traces.append(dict(
+        type='bar',
+        x=days,
+        y=weekly.astype(plot_dtype),
+        marker=dict(color=bar_colors),
+        name='Weekly Pattern',
+        text=np.char.mod('%.0f', weekly).tolist(),
+        textposition='outside',
+        textfont=styles['weekly_text'],
+        hovertemplate=HOVER_TEMPLATES['weekly'],
+        **_CELL_AXES[2, 1]
+    ))
 
     # 4. Inventory Projection
-    cumulative_demand = np.cumsum(forecast_values)
-    fig.add_trace(
-        go.Scatter(
+    if has_forecast:
+        cumulative_demand = np.cumsum(values).astype(plot_dtype)
+        traces.append(dict(
+            type=_line_type(len(cumulative_demand)),
             x=forecast_dates,
             y=cumulative_demand,
             mode='lines+markers',
             name='Cumulative Demand',
-            line=dict(color=colors['inventory'], width=3),
-            marker=dict(size=7, color=colors['inventory']),
+            line=styles['inventory_line'],
+            marker=styles['inventory_marker'],
             fill='tozeroy',
             fillcolor=colors['fill_inv'],
-            hovertemplate='<b>%{x}</b><br>Total Demand: %{y:.0f} units<extra></extra>'
-        ),
-        row=2, col=2
-    )
-
-    # Update layout — Theme-aware
-    template = 'plotly_dark' if dark else 'plotly_white'
-    title_color = '#e2e8f0' if dark else '#1e1b2e'
-    legend_bg = 'rgba(15, 20, 40, 0.7)' if dark else 'rgba(255, 255, 255, 0.7)'
-    legend_border = 'rgba(100, 126, 234, 0.15)' if dark else 'rgba(236, 72, 153, 0.1)'
-    plot_bg = 'rgba(15, 20, 40, 0.3)' if dark else 'rgba(253, 242, 248, 0.2)'
-
-    fig.update_layout(
-        height=900,
-        showlegend=True,
-        template=template,
-        font=dict(family="Inter, sans-serif", size=12, color=colors['text']),
-        title=dict(
-            text="<b>AI-Powered Inventory Intelligence Dashboard</b>",
-            x=0.5,
-            xanchor='center',
-            font=dict(size=22, color=title_color)
-        ),
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="right",
-            x=1,
-            bgcolor=legend_bg,
-            bordercolor=legend_border,
-            borderwidth=1,
-            font=dict(color=colors['text'])
-        ),
-        hovermode='x unified',
-        plot_bgcolor=plot_bg,
-        paper_bgcolor='rgba(0, 0, 0, 0)',
-    )
-
-    # Update subplot title colors
-    subtitle_color = '#c8d2e6' if dark else '#4a2040'
-    for annotation in fig.layout.annotations:
-        annotation.font.color = subtitle_color
-
-    # Update axes — dark grid
-    fig.update_xaxes(
-        showgrid=True,
-        gridwidth=1,
-        gridcolor=colors['grid'],
-        tickfont=dict(color=colors['text_light']),
-        title_font=dict(color=colors['text']),
-        zeroline=False
-    )
-
-    fig.update_yaxes(
-        showgrid=True,
-        gridwidth=1,
-        gridcolor=colors['grid'],
-        tickfont=dict(color=colors['text_light']),
-        title_font=dict(color=colors['text']),
-        zeroline=False
-    )
+            hovertemplate=HOVER_TEMPLATES['inventory'],
+            **_CELL_AXES[2, 2]
+        ))
 
-    return fig
+    go = get_plotly()
+    return go.Figure(dict(data=traces, layout=_layout_skeleton(dark)), skip_invalid=True)
@@ -4,13 +4,96 @@ Dashboard layout and UI components
 
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
+import numpy as np
 from dashboard.metrics import create_metric_card
-from dashboard.charts import create_dashboard
-from utils.data_loader import load_and_validate_data
+from dashboard.charts import create_dashboard, get_plotly, WEBGL_MIN_POINTS
+from utils.data_loader import load_and_validate_data, get_product_groups
 from config.theme import is_dark_theme
-import re
+import io
 import os
+from datetime import date
+from types import MappingProxyType
+from PIL import Image
+
+LOGO_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "sia_logo.jpeg")
+
+# Recommendation box markup per inventory state, filled from the inventory
+# and config dicts
+RECOMMENDATION_TEMPLATES = MappingProxyType({
+    'critical': """
+<div class="critical-box fade-in">
+    <div class="recommendation-title">🚨 CRITICAL: IMMEDIATE ACTION REQUIRED</div>
+    <div class="recommendation-value">{order_quantity:,}</div>
+    <div style="font-size: 1.3rem; margin-bottom: 1rem; opacity: 0.9;">UNITS TO ORDER NOW</div>
+    <div class="recommendation-details">
+        ⚡ <strong>Urgency:</strong> Only {days_until_stockout:.0f} days of stock remaining<br>
+        📊 <strong>Reorder Point:</strong> {reorder_point:,} units<br>
+        🛡️ <strong>Safety Stock:</strong> {safety_stock:,} units ({dynamic_buffer}% buffer)<br>
+        📈 <strong>Forecast Demand:</strong> {total_forecast:,} units over {forecast_days} days<br>
+        🎯 <strong>Service Level:</strong> {service_percent:.0f}%<br>
+        ⏱️ <strong>Lead Time:</strong> {lead_time} days
+    </div>
+</div>
+""",
+    'restock': """
+<div class="recommendation-box fade-in">
+    <div class="recommendation-title">📦 RESTOCKING RECOMMENDED</div>
+    <div class="recommendation-value">{order_quantity:,}</div>
+    <div style="font-size: 1.3rem; margin-bottom: 1rem; opacity: 0.9;">UNITS TO ORDER</div>
+    <div class="recommendation-details">
+        ✅ <strong>Stock Status:</strong> {days_until_stockout:.0f} days remaining<br>
+        📊 <strong>Reorder Point:</strong> {reorder_point:,} units<br>
+        🛡️ <strong>Safety Stock:</strong> {safety_stock:,} units ({dynamic_buffer}% buffer)<br>
+        📈 <strong>Forecast Demand:</strong> {total_forecast:,} units over {forecast_days} days<br>
+        🎯 <strong>Service Level:</strong> {service_percent:.0f}% confidence<br>
+        ⏱️ <strong>Lead Time:</strong> {lead_time} days
+    </div>
+</div>
+""",
+    'optimal': """
+<div class="safe-box fade-in">
+    <div class="recommendation-title">✅ INVENTORY LEVEL OPTIMAL</div>
+    <div class="recommendation-value">NO ORDER NEEDED</div>
+    <div class="recommendation-details">
+        🎯 <strong>Stock Coverage:</strong> {days_until_stockout:.0f} days<br>
+        📊 <strong>Current Position:</strong> {current_stock:,} units<br>
+        📈 <strong>Daily Demand:</strong> {daily_demand:.1f} units<br>
+        🛡️ <strong>Reorder Point:</strong> {reorder_point:,} units<br>
+        ✅ <strong>Status:</strong> Well above reorder threshold
+    </div>
+</div>
+""",
+})
+
+
+@st.cache_resource(show_spinner=False)
+def load_logo():
+    """Decode the sidebar logo once per process, or None if it is missing"""
+    if not os.path.exists(LOGO_PATH):
+        return None
+    logo = Image.open(LOGO_PATH)
+    logo.load()
+    return logo
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def cached_load(file_bytes, sample_day=None):
+    """
+    Parse and validate an upload once per distinct file content.
+
+    Streamlit keys the cache on the raw bytes, so widget reruns skip the CSV
+    parse and dtype coercion; the loader's sidebar messages are replayed on
+    cache hits. With no upload the sample is regenerated once per
+    ``sample_day`` so its dates keep ending today.
+
+    Returns:
+        Tuple of (df, product_groups), the row positions of each product
+        computed here once per load; (None, None) if loading failed
+    """
+    df = load_and_validate_data(None if file_bytes is None else io.BytesIO(file_bytes))
+    if df is None:
+        return None, None
+    return df, get_product_groups(df)
 
 
 def render_header():
@@ -32,12 +115,13 @@ def render_sidebar():
     Render sidebar with all configuration options.
 
     Returns:
-        Dict with all configuration values, including 'data_loaded' flag and 'df'.
+        Dict with all configuration values, including 'data_loaded' flag, 'df'
+        and its 'product_groups' row positions.
     """
     # Sidebar branding
-    logo_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "sia_logo.jpeg")
-    if os.path.exists(logo_path):
-        st.sidebar.image(logo_path, width=180)
+    logo = load_logo()
+    if logo is not None:
+        st.sidebar.image(logo, width=180)
 
     st.sidebar.markdown("""
     <div class="sidebar-brand">
@@ -90,12 +174,16 @@ def render_sidebar():
 2024-01-03,PROD001,48""")
 
     # Load and validate data
-    df = load_and_validate_data(uploaded_file)
+    if uploaded_file is not None:
+        df, product_groups = cached_load(uploaded_file.getvalue())
+    else:
+        df, product_groups = cached_load(None, date.today().isoformat())
 
     if df is None:
         return {'data_loaded': False, 'uploaded_file': None}
 
-    products = sorted(df['product_id'].unique())
+    # Categories are already sorted and held as metadata, so no column scan
+    products = df['product_id'].cat.categories.tolist()
 
     st.sidebar.markdown("### 🏷️ Product Selection")
     selected_product = st.sidebar.selectbox(
@@ -158,6 +246,7 @@ def render_sidebar():
     return {
         'data_loaded': True,
         'df': df,
+        'product_groups': product_groups,
         'uploaded_file': uploaded_file,
         'selected_product': selected_product,
         'products': products,
@@ -169,7 +258,7 @@ def render_sidebar():
     }
 
 
-def render_welcome_screen(df, products):
+def render_welcome_screen(df, products, product_groups):
     """Render welcome screen with data overview and hero cards"""
     st.markdown("## 👋 Welcome to Smart Inventory AI", unsafe_allow_html=True)
     st.markdown("<hr>", unsafe_allow_html=True)
@@ -222,23 +311,41 @@ def render_welcome_screen(df, products):
 
     # Data Preview
     st.markdown("### 📋 Data Preview", unsafe_allow_html=True)
+    # Units are drawn as in-cell bars by the frontend; a pandas Styler would
+    # build CSS per cell in Python and import matplotlib for the colormap
+    preview = df.head(20)
     st.dataframe(
-        df.head(20).style.background_gradient(cmap='Blues', subset=['units_sold']),
+        preview,
         use_container_width=True,
-        height=400
+        height=400,
+        column_config={
+            'units_sold': st.column_config.ProgressColumn(
+                'units_sold',
+                format='%d',
+                min_value=0,
+                max_value=max(int(preview['units_sold'].max()), 1)
+            )
+        }
     )
 
     # Quick Trend Visualization
     st.markdown("### 📊 Product Trends Overview", unsafe_allow_html=True)
 
-    fig = go.Figure()
+    go = get_plotly()
 
     colors = ['#667eea', '#a78bfa', '#f472b6', '#10b981', '#fbbf24']
+    traces = []
+    # Rows per product come from the index built once per load, each column
+    # is pulled out once, and a product's series is a positional take
+    dates = df['date'].to_numpy()
+    units = df['units_sold'].to_numpy()
     for i, prod in enumerate(products[:5]):
-        prod_data = df[df['product_id'] == prod]
-        fig.add_trace(go.Scatter(
-            x=prod_data['date'],
-            y=prod_data['units_sold'],
+        rows = product_groups[prod]
+        traces.append(dict(
+            # Same WebGL cut-over as the dashboard's long line series
+            type='scattergl' if len(rows) > WEBGL_MIN_POINTS else 'scatter',
+            x=dates[rows],
+            y=units[rows],
             mode='lines',
             name=prod,
             line=dict(width=2, color=colors[i % len(colors)]),
@@ -246,7 +353,9 @@ def render_welcome_screen(df, products):
         ))
 
     dark = is_dark_theme()
-    fig.update_layout(
+    # One constructor call validates traces and layout together, instead of
+    # a validation pass per add_trace plus one for update_layout
+    fig = go.Figure(dict(data=traces, layout=dict(
         height=450,
         template='plotly_dark' if dark else 'plotly_white',
         hovermode='x unified',
@@ -263,7 +372,7 @@ def render_welcome_screen(df, products):
         plot_bgcolor='rgba(15, 20, 40, 0.3)' if dark else 'rgba(253, 242, 248, 0.2)',
         xaxis=dict(gridcolor='rgba(100, 126, 234, 0.08)' if dark else 'rgba(236, 72, 153, 0.08)'),
         yaxis=dict(gridcolor='rgba(100, 126, 234, 0.08)' if dark else 'rgba(236, 72, 153, 0.08)')
-    )
+    )))
 
     st.plotly_chart(fig, use_container_width=True)
 
@@ -300,14 +409,48 @@ def render_welcome_screen(df, products):
         """, unsafe_allow_html=True)
 
 
+# Streamlit cannot hash a DatetimeIndex itself; its int64 ticks identify it
+_DATETIME_INDEX_HASH = {pd.DatetimeIndex: lambda idx: idx.asi8.tobytes()}
+
+
+@st.cache_data(max_entries=32, show_spinner=False, hash_funcs=_DATETIME_INDEX_HASH)
+def cached_dashboard(historical_df, forecast_dates, forecast_values, confidences, anomaly_df,
+                     anomaly_mask, dark):
+    """Build the dashboard figure once per set of inputs and theme"""
+    return create_dashboard(historical_df, forecast_dates, forecast_values, confidences, anomaly_df,
+                            anomaly_mask=anomaly_mask, dark=dark)
+
+
+@st.cache_data(max_entries=32, show_spinner=False, hash_funcs=_DATETIME_INDEX_HASH)
+def cached_forecast_table(forecast_dates, forecast_values, confidences):
+    """Forecast table and its CSV export bytes, built once per forecast"""
+    if forecast_dates is None:
+        return None, None
+    forecast_df = _build_forecast_df(forecast_dates, forecast_values, confidences)
+    return forecast_df, forecast_df.to_csv(index=False).encode("utf-8")
+
+
+def _build_forecast_df(forecast_dates, forecast_values, confidences):
+    """Forecast table shared by the detailed view and the CSV export"""
+    values = np.asarray(forecast_values)
+    bands = np.asarray(confidences)
+    return pd.DataFrame({
+        'Date': pd.to_datetime(forecast_dates).strftime('%Y-%m-%d'),
+        'Forecast': np.rint(values).astype(int),
+        'Lower Bound': np.rint(np.maximum(0, values - bands)).astype(int),
+        'Upper Bound': np.rint(values + bands).astype(int),
+        'Confidence (±)': np.rint(bands).astype(int)
+    })
+
+
 def render_results(product_data, forecast_dates, forecast_values, confidences,
-                   anomaly_df, inventory, insights, accuracy, config):
+                   anomaly_df, anomaly_mask, anomaly_count, inventory, insights, accuracy, config):
     """Render analysis results"""
     st.markdown("## 📊 Analysis Results", unsafe_allow_html=True)
     st.markdown("<hr>", unsafe_allow_html=True)
 
     # Top Metrics
-    render_top_metrics(product_data, forecast_values, anomaly_df, inventory, config)
+    render_top_metrics(product_data, forecast_values, anomaly_count, inventory, config)
 
     st.markdown("<br>", unsafe_allow_html=True)
 
@@ -318,24 +461,29 @@ def render_results(product_data, forecast_dates, forecast_values, confidences,
 
     # Dashboard
     st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-    fig = create_dashboard(product_data, forecast_dates, forecast_values, confidences, anomaly_df)
+    fig = cached_dashboard(product_data, forecast_dates, forecast_values, confidences, anomaly_df,
+                           anomaly_mask, is_dark_theme())
     st.plotly_chart(fig, use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
     # Business Insights
     render_business_insights(insights)
 
+    # Forecast table and CSV, built once per forecast for the detailed view
+    # and the export rather than re-serialized on every rerun
+    forecast_df, forecast_csv = cached_forecast_table(forecast_dates, forecast_values, confidences)
+
     # Detailed Data
-    render_detailed_data(forecast_dates, forecast_values, confidences, accuracy)
+    render_detailed_data(forecast_df, accuracy)
 
     # Export Options
-    render_export_options(forecast_dates, forecast_values, confidences, insights, config)
+    render_export_options(forecast_csv, insights, config)
 
     # Footer
     render_footer()
 
 
-def render_top_metrics(product_data, forecast_values, anomaly_df, inventory, config):
+def render_top_metrics(product_data, forecast_values, anomaly_count, inventory, config):
     """Render top-level metric cards"""
     col1, col2, col3, col4, col5 = st.columns(5)
 
@@ -353,7 +501,7 @@ def render_top_metrics(product_data, forecast_values, anomaly_df, inventory, con
     with col2:
         st.markdown(create_metric_card(
             "7-Day Forecast",
-            f"{sum(forecast_values[:7]):,.0f}",
+            f"{np.sum(forecast_values[:7]):,.0f}",
             delta=trend_delta,
             icon="📈"
         ), unsafe_allow_html=True)
@@ -361,7 +509,7 @@ def render_top_metrics(product_data, forecast_values, anomaly_df, inventory, con
     with col3:
         st.markdown(create_metric_card(
             "Anomalies",
-            f"{anomaly_df['is_anomaly'].sum()}",
+            f"{anomaly_count}",
             icon="⚠️"
         ), unsafe_allow_html=True)
 
@@ -385,51 +533,13 @@ def render_recommendation_box(inventory, config):
     """Render inventory recommendation box"""
     if inventory['should_order']:
         if inventory['days_until_stockout'] < config['lead_time']:
-            st.markdown(f"""
-            <div class="critical-box fade-in">
-                <div class="recommendation-title">🚨 CRITICAL: IMMEDIATE ACTION REQUIRED</div>
-                <div class="recommendation-value">{inventory['order_quantity']:,}</div>
-                <div style="font-size: 1.3rem; margin-bottom: 1rem; opacity: 0.9;">UNITS TO ORDER NOW</div>
-                <div class="recommendation-details">
-                    ⚡ <strong>Urgency:</strong> Only {inventory['days_until_stockout']:.0f} days of stock remaining<br>
-                    📊 <strong>Reorder Point:</strong> {inventory['reorder_point']:,} units<br>
-                    🛡️ <strong>Safety Stock:</strong> {inventory['safety_stock']:,} units ({inventory['dynamic_buffer']}% buffer)<br>
-                    📈 <strong>Forecast Demand:</strong> {inventory['total_forecast']:,} units over {config['forecast_days']} days<br>
-                    🎯 <strong>Service Level:</strong> {config['service_level']*100:.0f}%<br>
-                    ⏱️ <strong>Lead Time:</strong> {config['lead_time']} days
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
+            template = RECOMMENDATION_TEMPLATES['critical']
         else:
-            st.markdown(f"""
-            <div class="recommendation-box fade-in">
-                <div class="recommendation-title">📦 RESTOCKING RECOMMENDED</div>
-                <div class="recommendation-value">{inventory['order_quantity']:,}</div>
-                <div style="font-size: 1.3rem; margin-bottom: 1rem; opacity: 0.9;">UNITS TO ORDER</div>
-                <div class="recommendation-details">
-                    ✅ <strong>Stock Status:</strong> {inventory['days_until_stockout']:.0f} days remaining<br>
-                    📊 <strong>Reorder Point:</strong> {inventory['reorder_point']:,} units<br>
-                    🛡️ <strong>Safety Stock:</strong> {inventory['safety_stock']:,} units ({inventory['dynamic_buffer']}% buffer)<br>
-                    📈 <strong>Forecast Demand:</strong> {inventory['total_forecast']:,} units over {config['forecast_days']} days<br>
-                    🎯 <strong>Service Level:</strong> {config['service_level']*100:.0f}% confidence<br>
-                    ⏱️ <strong>Lead Time:</strong> {config['lead_time']} days
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
+            template = RECOMMENDATION_TEMPLATES['restock']
     else:
-        st.markdown(f"""
-        <div class="safe-box fade-in">
-            <div class="recommendation-title">✅ INVENTORY LEVEL OPTIMAL</div>
-            <div class="recommendation-value">NO ORDER NEEDED</div>
-            <div class="recommendation-details">
-                🎯 <strong>Stock Coverage:</strong> {inventory['days_until_stockout']:.0f} days<br>
-                📊 <strong>Current Position:</strong> {config['current_stock']:,} units<br>
-                📈 <strong>Daily Demand:</strong> {inventory['daily_demand']:.1f} units<br>
-                🛡️ <strong>Reorder Point:</strong> {inventory['reorder_point']:,} units<br>
-                ✅ <strong>Status:</strong> Well above reorder threshold
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
+        template = RECOMMENDATION_TEMPLATES['optimal']
+    st.markdown(template.format_map(dict(inventory, **config, service_percent=config['service_level'] * 100)),
+                unsafe_allow_html=True)
 
 
 def render_business_insights(insights):
@@ -437,24 +547,17 @@ def render_business_insights(insights):
     st.markdown("## 💡 AI-Generated Business Insights", unsafe_allow_html=True)
     st.markdown("<hr>", unsafe_allow_html=True)
 
-    for insight in insights:
-        st.markdown(insight, unsafe_allow_html=True)
+    for html, _ in insights:
+        st.markdown(html, unsafe_allow_html=True)
 
 
-def render_detailed_data(forecast_dates, forecast_values, confidences, accuracy):
+def render_detailed_data(forecast_df, accuracy):
     """Render detailed forecast data in expander"""
     with st.expander("🔍 **View Detailed Forecast Data & Model Performance**", expanded=False):
         col1, col2 = st.columns(2)
 
         with col1:
             st.markdown("### 📊 Forecast Table")
-            forecast_df = pd.DataFrame({
-                'Date': [d.strftime('%Y-%m-%d') for d in forecast_dates],
-                'Forecast': [round(v) for v in forecast_values],
-                'Lower Bound': [round(max(0, v - c)) for v, c in zip(forecast_values, confidences)],
-                'Upper Bound': [round(v + c) for v, c in zip(forecast_values, confidences)],
-                'Confidence (±)': [round(c) for c in confidences]
-            })
             st.dataframe(forecast_df, use_container_width=True, height=400)
 
         with col2:
@@ -476,7 +579,7 @@ def render_detailed_data(forecast_dates, forecast_values, confidences, accuracy)
 
                     st.markdown(f"**Accuracy Rating:** {acc_status}")
                 else:
-                    st.info("MAPE unavailable (some actual values are zero)")
+                    st.info("MAPE unavailable (no sales in the backtest window)")
 
                 # Comparison chart
                 comp_df = pd.DataFrame({
@@ -488,41 +591,26 @@ def render_detailed_data(forecast_dates, forecast_values, confidences, accuracy)
                 st.info("Insufficient data for accuracy calculation (need 30+ days)")
 
 
-def clean_html_tags(text):
-    """Remove HTML tags from insight text"""
-    clean = re.sub(r'<.*?>', '', text)
-    return clean.strip()
-
-
-def render_export_options(forecast_dates, forecast_values, confidences, insights, config):
+def render_export_options(forecast_csv, insights, config):
     """Render export options"""
-    if forecast_dates is None:
+    if forecast_csv is None:
         return
 
     st.markdown("## 📥 Export Options")
 
     col1, col2, col3 = st.columns(3)
 
-    forecast_df = pd.DataFrame({
-        'Date': [d.strftime('%Y-%m-%d') for d in forecast_dates],
-        'Forecast': [round(v) for v in forecast_values],
-        'Lower Bound': [round(max(0, v - c)) for v, c in zip(forecast_values, confidences)],
-        'Upper Bound': [round(v + c) for v, c in zip(forecast_values, confidences)],
-        'Confidence (±)': [round(c) for c in confidences]
-    })
-
     with col1:
         st.download_button(
             label="📊 Download Forecast CSV",
-            data=forecast_df.to_csv(index=False).encode("utf-8"),
+            data=forecast_csv,
             file_name=f"forecast_{config['selected_product']}.csv",
             mime="text/csv",
             use_container_width=True
         )
 
     with col2:
-        cleaned_insights = [clean_html_tags(insight) for insight in insights]
-        insights_text = "\n\n".join(cleaned_insights)
+        insights_text = "\n\n".join(text for _, text in insights)
 
         st.download_button(
             label="💡 Download Insights",
@@ -2,6 +2,17 @@
 Metric card generation module
 """
 
+# Card markup lives once at module level; callers only fill in the fields
+METRIC_CARD_TEMPLATE = """
+<div class="metric-card slide-in">
+    <div class="metric-label">{icon} {label}</div>
+    <div class="metric-value">{value}</div>
+    {delta_html}
+</div>
+"""
+
+METRIC_DELTA_TEMPLATE = '<div class="metric-delta" style="color: {color};">{symbol} {percent:.1f}%</div>'
+
 
 def create_metric_card(label, value, delta=None, icon="📊"):
     """
@@ -20,12 +31,6 @@ def create_metric_card(label, value, delta=None, icon="📊"):
     if delta is not None:
         delta_color = "#10b981" if delta > 0 else "#ef4444" if delta < 0 else "#94a3b8"
         delta_symbol = "▲" if delta > 0 else "▼" if delta < 0 else "●"
-        delta_html = f'<div class="metric-delta" style="color: {delta_color};">{delta_symbol} {abs(delta):.1f}%</div>'
+        delta_html = METRIC_DELTA_TEMPLATE.format(color=delta_color, symbol=delta_symbol, percent=abs(delta))
 
-    return f"""
-    <div class="metric-card slide-in">
-        <div class="metric-label">{icon} {label}</div>
-        <div class="metric-value">{value}</div>
-        {delta_html}
-    </div>
-    """
+    return METRIC_CARD_TEMPLATE.format(icon=icon, label=label, value=value, delta_html=delta_html)
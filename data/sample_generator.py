@@ -22,39 +22,43 @@ def generate_sample_data(days=120, num_products=5):
     dates = pd.date_range(end=datetime.now(), periods=days, freq='D')
     products = [f'PROD-{str(i).zfill(3)}' for i in range(1, num_products + 1)]
 
-    data = []
-    for i, product in enumerate(products):
-        base = 30 + (i * 20) + np.random.randint(-5, 5)
-
-        # Apply different trends to different products
-        if i % 3 == 0:
-            trend = np.linspace(0, 30, days)
-        elif i % 3 == 1:
-            trend = np.linspace(20, -10, days)
-        else:
-            trend = np.zeros(days)
-
-        # Seasonal patterns
-        seasonality = 10 * np.sin(np.linspace(0, 8*np.pi, days))
-        monthly = 5 * np.sin(np.linspace(0, 4*np.pi, days))
-        noise = np.random.normal(0, 3, days)
+    # Random draws stay per product, in the original order, so the seeded
+    # demo dataset is unchanged; everything else is one (products, days) array
+    bases = np.empty(num_products)
+    noise = np.empty((num_products, days))
+    anomalies = np.zeros((num_products, days))
+    for i in range(num_products):
+        bases[i] = 30 + (i * 20) + np.random.randint(-5, 5)
+        noise[i] = np.random.normal(0, 3, days)
 
         # Add random anomalies
-        anomalies = np.zeros(days)
         anomaly_days = np.random.choice(days, size=3, replace=False)
-        for day in anomaly_days:
-            anomalies[day] = np.random.choice([-20, 25])
-
-        # Calculate final values
-        units_sold = base + trend + seasonality + monthly + noise + anomalies
-        units_sold = np.maximum(units_sold, 0).astype(int)
-
-        # Create records
-        for j, date in enumerate(dates):
-            data.append({
-                'date': date.strftime('%Y-%m-%d'),
-                'product_id': product,
-                'units_sold': units_sold[j]
-            })
-
-    return pd.DataFrame(data)
+        anomalies[i, anomaly_days] = np.random.choice([-20, 25], size=3)
+
+    # Apply different trends to different products: rising, falling, flat
+    trend_ends = np.array([(0, 30), (20, -10), (0, 0)])[np.arange(num_products) % 3]
+    trend = np.linspace(trend_ends[:, 0], trend_ends[:, 1], days, axis=1)
+
+    # Seasonal patterns
+    seasonality = 10 * np.sin(np.linspace(0, 8*np.pi, days))
+    monthly = 5 * np.sin(np.linspace(0, 4*np.pi, days))
+
+    # Calculate final values, accumulating in place in the original summation
+    # order so one buffer is written instead of a temporary per term
+    units_sold = bases[:, None] + trend
+    units_sold += seasonality
+    units_sold += monthly
+    units_sold += noise
+    units_sold += anomalies
+    np.maximum(units_sold, 0, out=units_sold)
+    units_sold = units_sold.astype(np.int32)
+
+    # Emitted in the loader's dtypes: midnight dates, categorical product ids
+    # built straight from codes, and int32 units
+    return pd.DataFrame({
+        'date': np.tile(dates.normalize().to_numpy(), num_products),
+        'product_id': pd.Categorical.from_codes(
+            np.repeat(np.arange(num_products, dtype=np.int16), days), categories=products
+        ),
+        'units_sold': units_sold.ravel()
+    })
@@ -0,0 +1,29 @@
+"""
+Ahead-of-time build of the anomaly detection kernel
+
+Run once at build/deploy time from the repository root:
+
+    python -m models._kernels_aot
+
+This writes the inv_kernels extension module next to this file. When it
+is importable, models.anomaly uses it instead of JIT-compiling the kernel
+on the first analysis; otherwise it falls back to numba.njit.
+"""
+
+import os
+
+from numba.pycc import CC
+
+from models.anomaly import _fill_anomaly_stats
+
+cc = CC('inv_kernels')
+cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+
+cc.export(
+    'anomaly_kernel',
+    'void(f8[:], i8, f8, f8, f8, b1[:], f8[:])'
+)(_fill_anomaly_stats)
+
+
+if __name__ == '__main__':
+    cc.compile()
@@ -2,10 +2,88 @@
 Explainability and business insights generation module
 """
 
+from types import MappingProxyType
 import numpy as np
 
 
-def generate_insights(product_data, forecast_result, anomaly_data, inventory_rec, accuracy_metrics):
+def _insight_card(icon, body, text):
+    """
+    Card markup for an insight body, paired with its plain-text form
+
+    Returns:
+        Tuple of (html, text) str.format templates sharing the same fields
+    """
+    return f'<div class="insight-card fade-in"><span class="insight-icon">{icon}</span>{body}</div>', icon + text
+
+
+# Every insight variant as an (html, text) pair of str.format templates,
+# keyed by the branch that selects it; the text form is written out here
+# so the export never has to strip markup
+INSIGHT_TEMPLATES = MappingProxyType({
+    'trend_up': _insight_card(
+        '📈', '<strong>Significant Trend:</strong> Sales changed by '
+              '<span class="status-badge badge-success">{change:.1f}%</span> up compared to previous week',
+        'Significant Trend: Sales changed by {change:.1f}% up compared to previous week'),
+    'trend_down': _insight_card(
+        '📉', '<strong>Significant Trend:</strong> Sales changed by '
+              '<span class="status-badge badge-danger">{change:.1f}%</span> down compared to previous week',
+        'Significant Trend: Sales changed by {change:.1f}% down compared to previous week'),
+    'trend_stable': _insight_card(
+        '➡️', '<strong>Stable Trend:</strong> Sales consistent at ~{recent:.0f} units/day',
+        'Stable Trend: Sales consistent at ~{recent:.0f} units/day'),
+    'volatility_high': _insight_card(
+        '⚠️', '<strong>High Volatility</strong> <span class="status-badge badge-warning">CV: {cv:.2f}</span>: '
+              'Demand unpredictable, {buffer}% safety buffer applied',
+        'High Volatility CV: {cv:.2f}: Demand unpredictable, {buffer}% safety buffer applied'),
+    'volatility_moderate': _insight_card(
+        '📊', '<strong>Moderate Volatility</strong> <span class="status-badge badge-info">CV: {cv:.2f}</span>: '
+              'Some demand variation expected',
+        'Moderate Volatility CV: {cv:.2f}: Some demand variation expected'),
+    'volatility_low': _insight_card(
+        '✅', '<strong>Low Volatility</strong> <span class="status-badge badge-success">CV: {cv:.2f}</span>: '
+              'Very predictable demand pattern',
+        'Low Volatility CV: {cv:.2f}: Very predictable demand pattern'),
+    'anomalies': _insight_card(
+        '🚨', '<strong>{count} Anomalies Detected:</strong> Recent unusual activity on '
+              '{dates}. Review for promotions or stockouts.',
+        '{count} Anomalies Detected: Recent unusual activity on {dates}. Review for promotions or stockouts.'),
+    'no_anomalies': _insight_card(
+        '✅', '<strong>No Anomalies:</strong> Sales pattern is normal and predictable',
+        'No Anomalies: Sales pattern is normal and predictable'),
+    'accuracy': _insight_card(
+        '🎯', '<strong>Forecast Accuracy:</strong> Historical MAPE of '
+              '<span class="status-badge badge-success">{mape:.1f}%</span> '
+              '(±{interval} units confidence interval)',
+        'Forecast Accuracy: Historical MAPE of {mape:.1f}% (±{interval} units confidence interval)'),
+    'stock_critical': _insight_card(
+        '🚨', '<strong>Critical Stock:</strong> Only <span class="status-badge badge-danger">'
+              '{days} days</span> of inventory left! Order immediately to avoid stockout.',
+        'Critical Stock: Only {days} days of inventory left! Order immediately to avoid stockout.'),
+    'stock_low': _insight_card(
+        '⚠️', '<strong>Low Stock:</strong> <span class="status-badge badge-warning">{days} days</span> '
+              'remaining. Reorder recommended.',
+        'Low Stock: {days} days remaining. Reorder recommended.'),
+    'stock_healthy': _insight_card(
+        '✅', '<strong>Healthy Stock:</strong> <span class="status-badge badge-success">{days} days</span> '
+              'of coverage available',
+        'Healthy Stock: {days} days of coverage available'),
+    'peak_day': _insight_card(
+        '📅', '<strong>Peak Day:</strong> {day} '
+              '<span class="status-badge badge-info">avg: {average:.0f} units</span>',
+        'Peak Day: {day} avg: {average:.0f} units'),
+})
+
+DAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+
+def _format_insight(key, **fields):
+    """Fill both forms of an insight template, giving an (html, text) tuple"""
+    html, text = INSIGHT_TEMPLATES[key]
+    return html.format(**fields), text.format(**fields)
+
+
+def generate_insights(product_data, forecast_result, anomaly_data, inventory_rec, accuracy_metrics,
+                      anomaly_mask=None, anomaly_count=None):
     """
     Generate comprehensive business insights from analysis results
     
@@ -15,85 +93,73 @@ def generate_insights(product_data, forecast_result, anomaly_data, inventory_rec
         anomaly_data: DataFrame with anomaly detection results
         inventory_rec: Inventory recommendations dict
         accuracy_metrics: Model accuracy metrics
+        anomaly_mask: Optional precomputed boolean ndarray of anomaly_data['is_anomaly']
+        anomaly_count: Optional precomputed number of anomalies
         
     Returns:
-        List of HTML-formatted insight strings
+        List of (html, plain_text) tuples, one per insight
     """
     insights = []
+    # One array for every tail statistic instead of a Series slice per stat
+    units = product_data['units_sold'].to_numpy(dtype=np.float64)
 
     # Trend Analysis
-    recent_7 = product_data['units_sold'].tail(7).mean()
-    prev_7 = product_data['units_sold'].tail(14).head(7).mean()
+    recent_7 = units[-7:].mean()
+    prev_7 = units[-14:][:7].mean()
     trend_change = ((recent_7 - prev_7) / prev_7 * 100) if prev_7 > 0 else 0
 
     if abs(trend_change) > 15:
-        trend_icon = "📈" if trend_change > 0 else "📉"
-        badge = "badge-success" if trend_change > 0 else "badge-danger"
-        insights.append(f'<div class="insight-card fade-in"><span class="insight-icon">{trend_icon}</span>'
-                       f'<strong>Significant Trend:</strong> Sales changed by '
-                       f'<span class="status-badge {badge}">{abs(trend_change):.1f}%</span> '
-                       f'{"up" if trend_change > 0 else "down"} compared to previous week</div>')
+        key = 'trend_up' if trend_change > 0 else 'trend_down'
+        insights.append(_format_insight(key, change=abs(trend_change)))
     else:
-        insights.append(f'<div class="insight-card fade-in"><span class="insight-icon">➡️</span>'
-                       f'<strong>Stable Trend:</strong> Sales consistent at ~{recent_7:.0f} units/day</div>')
+        insights.append(_format_insight('trend_stable', recent=recent_7))
 
     # Volatility Analysis
-    cv = product_data['units_sold'].tail(30).std() / recent_7 if recent_7 > 0 else 0
+    cv = units[-30:].std(ddof=1) / recent_7 if recent_7 > 0 else 0
     if cv > 0.4:
-        insights.append(f'<div class="insight-card fade-in"><span class="insight-icon">⚠️</span>'
-                       f'<strong>High Volatility</strong> <span class="status-badge badge-warning">CV: {cv:.2f}</span>: '
-                       f'Demand unpredictable, {inventory_rec["dynamic_buffer"]}% safety buffer applied</div>')
+        insights.append(_format_insight('volatility_high', cv=cv, buffer=inventory_rec['dynamic_buffer']))
     elif cv > 0.25:
-        insights.append(f'<div class="insight-card fade-in"><span class="insight-icon">📊</span>'
-                       f'<strong>Moderate Volatility</strong> <span class="status-badge badge-info">CV: {cv:.2f}</span>: '
-                       f'Some demand variation expected</div>')
+        insights.append(_format_insight('volatility_moderate', cv=cv))
     else:
-        insights.append(f'<div class="insight-card fade-in"><span class="insight-icon">✅</span>'
-                       f'<strong>Low Volatility</strong> <span class="status-badge badge-success">CV: {cv:.2f}</span>: '
-                       f'Very predictable demand pattern</div>')
+        insights.append(_format_insight('volatility_low', cv=cv))
 
     # Anomaly Summary
-    anomalies = anomaly_data[anomaly_data['is_anomaly']]
-    if len(anomalies) > 0:
-        recent_anomalies = anomalies.tail(3)
+    if anomaly_mask is None:
+        anomaly_mask = anomaly_data['is_anomaly'].to_numpy()
+    if anomaly_count is None:
+        anomaly_count = int(anomaly_mask.sum())
+    if anomaly_count > 0:
+        # Rows are date-sorted, so the last three flagged positions are the most recent
+        recent_anomalies = anomaly_data.iloc[np.flatnonzero(anomaly_mask)[-3:]]
         dates = recent_anomalies['date'].dt.strftime('%m-%d').tolist()
-        insights.append(f'<div class="insight-card fade-in"><span class="insight-icon">🚨</span>'
-                       f'<strong>{len(anomalies)} Anomalies Detected:</strong> Recent unusual activity on '
-                       f'{", ".join(dates)}. Review for promotions or stockouts.</div>')
+        insights.append(_format_insight('anomalies', count=anomaly_count, dates=", ".join(dates)))
     else:
-        insights.append(f'<div class="insight-card fade-in"><span class="insight-icon">✅</span>'
-                       f'<strong>No Anomalies:</strong> Sales pattern is normal and predictable</div>')
+        insights.append(_format_insight('no_anomalies'))
 
     # Forecast Accuracy
     if accuracy_metrics and accuracy_metrics.get('mape'):
-        insights.append(f'<div class="insight-card fade-in"><span class="insight-icon">🎯</span>'
-                       f'<strong>Forecast Accuracy:</strong> Historical MAPE of '
-                       f'<span class="status-badge badge-success">{accuracy_metrics["mape"]:.1f}%</span> '
-                       f'(±{inventory_rec["confidence_interval"]} units confidence interval)</div>')
+        insights.append(_format_insight(
+            'accuracy', mape=accuracy_metrics['mape'], interval=inventory_rec['confidence_interval']
+        ))
 
     # Stock Status
     days_left = inventory_rec['days_until_stockout']
     lead_time = inventory_rec.get('lead_time', 7)
 
     if days_left < lead_time:
-        insights.append(f'<div class="insight-card fade-in"><span class="insight-icon">🚨</span>'
-                       f'<strong>Critical Stock:</strong> Only <span class="status-badge badge-danger">'
-                       f'{days_left} days</span> of inventory left! Order immediately to avoid stockout.</div>')
+        insights.append(_format_insight('stock_critical', days=days_left))
     elif days_left < lead_time * 2:
-        insights.append(f'<div class="insight-card fade-in"><span class="insight-icon">⚠️</span>'
-                       f'<strong>Low Stock:</strong> <span class="status-badge badge-warning">{days_left} days</span> '
-                       f'remaining. Reorder recommended.</div>')
+        insights.append(_format_insight('stock_low', days=days_left))
     else:
-        insights.append(f'<div class="insight-card fade-in"><span class="insight-icon">✅</span>'
-                       f'<strong>Healthy Stock:</strong> <span class="status-badge badge-success">{days_left} days</span> '
-                       f'of coverage available</div>')
-
-    # Seasonality Pattern
-    dow_pattern = product_data.groupby(product_data['date'].dt.dayofweek)['units_sold'].mean()
-    peak_day = dow_pattern.idxmax()
-    days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    insights.append(f'<div class="insight-card fade-in"><span class="insight-icon">📅</span>'
-                   f'<strong>Peak Day:</strong> {days[peak_day]} '
-                   f'<span class="status-badge badge-info">avg: {dow_pattern[peak_day]:.0f} units</span></div>')
+        insights.append(_format_insight('stock_healthy', days=days_left))
+
+    # Seasonality Pattern (day_of_week is precomputed by the loader)
+    dow = product_data['day_of_week'].to_numpy(dtype=np.intp)
+    counts = np.bincount(dow, minlength=7)
+    # Weekdays with no sales rows can never be the peak
+    dow_pattern = np.where(counts > 0, np.bincount(dow, weights=units, minlength=7) / np.maximum(counts, 1),
+                           -np.inf)
+    peak_day = int(dow_pattern.argmax())
+    insights.append(_format_insight('peak_day', day=DAY_NAMES[peak_day], average=dow_pattern[peak_day]))
 
     return insights
@@ -2,14 +2,92 @@
 Advanced forecasting engine with ensemble methods
 """
 
+from collections import namedtuple
+
 import pandas as pd
 import numpy as np
-from datetime import timedelta
-from sklearn.linear_model import LinearRegression
-from sklearn.metrics import mean_absolute_error
 import warnings
 warnings.filterwarnings('ignore')
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _ewma(x, alpha):
+    """
+    Recursive EWMA, y[t] = alpha * x[t] + (1 - alpha) * y[t-1]
+
+    The adjust=False recursion of pandas ewm, as one tight loop over a
+    float64 array.
+
+    Args:
+        x: 1-D float64 array with at least one value
+        alpha: Smoothing factor in (0, 1]
+
+    Returns:
+        float64 array of smoothed values
+    """
+    n = x.shape[0]
+    out = np.empty(n)
+    out[0] = x[0]
+    for i in range(1, n):
+        out[i] = alpha * x[i] + (1.0 - alpha) * out[i - 1]
+    return out
+
+
+if njit is not None:
+    _ewma = njit(cache=True)(_ewma)
+
+
+class LinearModel(namedtuple('LinearModel', ['slope', 'intercept'])):
+    """Fitted straight line, trend = intercept + slope * row position"""
+    __slots__ = ()
+
+    def predict(self, x):
+        """Trend value at each row position in x"""
+        return self.intercept + self.slope * np.asarray(x, dtype=np.float64)
+
+
+def _fit_linear_trend(units):
+    """
+    Closed-form least squares line through units against row position
+
+    Args:
+        units: 1-D float64 array of sales
+
+    Returns:
+        LinearModel; a single point gives a flat line
+    """
+    x = np.arange(len(units), dtype=np.float64)
+    # Slope is cov(x, y) / var(x) on centered data
+    x_mean = x.mean()
+    y_mean = units.mean()
+    dx = x - x_mean
+    sxx = dx @ dx
+    slope = (dx @ (units - y_mean)) / sxx if sxx > 0 else 0.0
+    return LinearModel(slope, y_mean - slope * x_mean)
+
+
+def _seasonal_factors(dow, units):
+    """
+    Normalized weekday means of units
+
+    Args:
+        dow: Integer day of week (Monday=0) of each row
+        units: 1-D float64 array of sales, aligned with dow
+
+    Returns:
+        Array of 7 factors indexed by day of week; weekdays absent from
+        the history get a neutral 1.0
+    """
+    # Weekday means as two bincount sweeps instead of a groupby
+    counts = np.bincount(dow, minlength=7)
+    pattern = np.bincount(dow, weights=units, minlength=7) / np.maximum(counts, 1)
+    observed = counts > 0
+    return np.where(observed, pattern / pattern[observed].mean(), 1.0)
+
 
 class ForecastingEngine:
     """Advanced forecasting engine with multiple methods"""
@@ -21,8 +99,19 @@ class ForecastingEngine:
         Args:
             data: DataFrame with 'date' and 'units_sold' columns
         """
-        self.data = data.copy()
-        self.data['day_index'] = range(len(self.data))
+        # Only read from, never written to, so the caller's frame is kept
+        # as is rather than copied
+        self.data = data
+        # Column arrays extracted once and shared by every method, so the
+        # backtest can forecast from slices of them instead of a new engine
+        self._units = self.data['units_sold'].to_numpy(dtype=np.float64)
+        self._dates = pd.DatetimeIndex(pd.to_datetime(self.data['date']))
+        # Frames from the loader already carry the weekday; derive it otherwise
+        if 'day_of_week' in self.data:
+            self._dow = self.data['day_of_week'].to_numpy()
+        else:
+            self._dow = self._dates.dayofweek.to_numpy()
+        self._last_date = self._dates.max()
 
     def ewma_forecast(self, span=14):
         """
@@ -34,31 +123,31 @@ class ForecastingEngine:
         Returns:
             Series of EWMA values
         """
-        return self.data['units_sold'].ewm(span=span, adjust=False).mean()
+        # Interpreted, the loop would lose to pandas' Cython ewm
+        if njit is None or len(self._units) == 0:
+            return self.data['units_sold'].ewm(span=span, adjust=False).mean()
+        return pd.Series(_ewma(self._units, 2.0 / (span + 1)), index=self.data.index, name='units_sold')
 
     def linear_trend(self):
         """
-        Linear regression trend
+        Linear regression trend (closed-form least squares fit)
         
         Returns:
-            Tuple of (model, predictions)
+            Tuple of (model, predictions), where model is a LinearModel
+            mapping the row position to the trend value
         """
-        X = self.data[['day_index']].values
-        y = self.data['units_sold'].values
-        model = LinearRegression()
-        model.fit(X, y)
-        return model, model.predict(X)
+        model = _fit_linear_trend(self._units)
+        return model, model.predict(np.arange(len(self._units)))
 
     def seasonal_pattern(self):
         """
         Weekly seasonality pattern
         
         Returns:
-            Series with normalized seasonal factors by day of week
+            Array of 7 normalized seasonal factors indexed by day of week
+            (Monday=0); weekdays absent from the history get a neutral 1.0
         """
-        self.data['day_of_week'] = pd.to_datetime(self.data['date']).dt.dayofweek
-        pattern = self.data.groupby('day_of_week')['units_sold'].mean()
-        return pattern / pattern.mean()
+        return _seasonal_factors(self._dow, self._units)
 
     def ensemble_forecast(self, forecast_days=14):
         """
@@ -68,49 +157,57 @@ class ForecastingEngine:
             forecast_days: Number of days to forecast
             
         Returns:
-            Tuple of (forecast_dates, forecast_values, confidences)
+            Tuple of (forecast_dates, forecast_values, confidences), the
+            values and confidences as float arrays
         """
-        # Get component forecasts
-        ewma = self.ewma_forecast()
-        model, linear_pred = self.linear_trend()
-        seasonal = self.seasonal_pattern()
+        return self._ensemble(self._units, self._dow, self._last_date, forecast_days)
+
+    @staticmethod
+    def _ensemble(units, dow, last_date, forecast_days):
+        """
+        Ensemble forecast from a history given as aligned arrays
+
+        Args:
+            units: 1-D float64 array of sales
+            dow: Day of week of each row
+            last_date: Timestamp of the last row
+            forecast_days: Number of days to forecast
+
+        Returns:
+            Same as ensemble_forecast
+        """
+        # Get component forecasts (the EWMA projection below extrapolates the
+        # recent average, so the smoothed series itself is not needed here)
+        model = _fit_linear_trend(units)
+        seasonal = _seasonal_factors(dow, units)
 
         # Calculate recent trends
-        recent_data = self.data.tail(14)
-        recent_avg = recent_data['units_sold'].mean()
-        recent_trend = (recent_data['units_sold'].iloc[-1] - recent_data['units_sold'].iloc[0]) / 14
+        recent_units = units[-14:]
+        recent_avg = recent_units.mean()
+        recent_trend = (recent_units[-1] - recent_units[0]) / 14
 
         # Generate forecast dates
-        last_date = pd.to_datetime(self.data['date'].max())
-        forecast_dates = [last_date + timedelta(days=i+1) for i in range(forecast_days)]
+        forecast_dates = pd.date_range(start=last_date + pd.Timedelta(days=1), periods=forecast_days, freq='D')
 
-        forecasts = []
-        confidences = []
+        # Every forecast day at once: row positions continue past the history
+        steps = np.arange(forecast_days)
+        day_idx = len(units) + steps
 
-        for i, date in enumerate(forecast_dates):
-            day_idx = len(self.data) + i
-            day_of_week = date.dayofweek
+        # Linear projection
+        linear_future = model.predict(day_idx)
 
-            # Linear projection
-            linear_future = model.predict([[day_idx]])[0]
-            
-            # EWMA projection
-            ewma_future = recent_avg + (recent_trend * i)
-            
-            # Seasonal adjustment
-            seasonal_factor = seasonal[day_of_week]
-            seasonal_future = recent_avg * seasonal_factor
+        # EWMA projection
+        ewma_future = recent_avg + (recent_trend * steps)
 
-            # Ensemble combination (weighted average)
-            ensemble = (0.3 * linear_future + 0.4 * ewma_future + 0.3 * seasonal_future)
-            ensemble = max(0, ensemble)
+        # Seasonal adjustment
+        seasonal_future = recent_avg * seasonal[forecast_dates.dayofweek]
 
-            # Confidence interval
-            historical_std = self.data['units_sold'].tail(30).std()
-            confidence = 1.96 * historical_std
+        # Ensemble combination (weighted average)
+        forecasts = np.maximum(0, 0.3 * linear_future + 0.4 * ewma_future + 0.3 * seasonal_future)
 
-            forecasts.append(ensemble)
-            confidences.append(confidence)
+        # Confidence interval, the same for every day
+        historical_std = units[-30:].std(ddof=1)
+        confidences = np.full(forecast_days, 1.96 * historical_std)
 
         return forecast_dates, forecasts, confidences
 
@@ -119,26 +216,29 @@ class ForecastingEngine:
         Calculate model accuracy on recent data using walk-forward validation
         
         Returns:
-            Dict with mae, mape, actual, and predicted values or None
+            Dict with mae, mape, actual, and predicted values or None; mape
+            is computed over the test days with sales, and is None if none had
         """
         if len(self.data) < 30:
             return None
 
-        # Split data: train on all but last 7 days, test on last 7
-        train = self.data[:-7]
-        test = self.data[-7:]
+        # Split data: train on all but last 7 days, test on last 7. The
+        # training history is a view of this engine's arrays, not a new engine
+        train_units = self._units[:-7]
 
-        if len(train) < 14:
+        if len(train_units) < 14:
             return None
 
         # Train model on training data
-        train_engine = ForecastingEngine(train)
-        _, pred, _ = train_engine.ensemble_forecast(forecast_days=7)
-        actual = test['units_sold'].values
-
-        # Calculate metrics
-        mae = mean_absolute_error(actual, pred)
-        mape = np.mean(np.abs((actual - pred) / actual)) * 100 if np.all(actual > 0) else None
+        _, pred, _ = self._ensemble(train_units, self._dow[:-7], self._dates[:-7].max(), 7)
+        actual = self.data['units_sold'].to_numpy()[-7:]
+
+        # Calculate metrics from one error array. MAPE skips days with no
+        # sales rather than being dropped whenever one appears
+        abs_err = np.abs(actual - pred)
+        mae = float(abs_err.mean())
+        sold = actual > 0
+        mape = float((abs_err[sold] / actual[sold]).mean() * 100) if sold.any() else None
 
         return {
             'mae': mae, 
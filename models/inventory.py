@@ -2,7 +2,63 @@
 Advanced inventory optimization module
 """
 
+from types import MappingProxyType
+
 import numpy as np
+import pandas as pd
+
+try:
+    from scipy.stats import norm
+except ImportError:
+    norm = None
+
+# Inverse normal z-scores for the service levels the sidebar slider offers
+# (0.80 to 0.99 in steps of 0.01) plus 0.975, so the usual case is a lookup
+# instead of a norm.ppf call. Values are norm.ppf's own, to full precision
+Z_SCORES = MappingProxyType({
+    0.80: 0.8416212335729143,
+    0.81: 0.8778962950512289,
+    0.82: 0.9153650878428138,
+    0.83: 0.9541652531461943,
+    0.84: 0.994457883209753,
+    0.85: 1.0364333894937898,
+    0.86: 1.0803193408149558,
+    0.87: 1.1263911290388007,
+    0.88: 1.1749867920660904,
+    0.89: 1.2265281200366105,
+    0.90: 1.2815515655446004,
+    0.91: 1.3407550336902165,
+    0.92: 1.4050715603096329,
+    0.93: 1.475791028179171,
+    0.94: 1.5547735945968535,
+    0.95: 1.6448536269514722,
+    0.96: 1.7506860712521692,
+    0.97: 1.8807936081512509,
+    0.975: 1.959963984540054,
+    0.98: 2.0537489106318225,
+    0.99: 2.3263478740408408,
+})
+
+
+def _z_score(service_level):
+    """
+    Inverse normal z-score for a service level
+
+    Args:
+        service_level: Target service level (probability of not stocking out)
+
+    Returns:
+        The z-score, from Z_SCORES when the level is listed there
+    """
+    # Rounding only absorbs float noise from the slider's steps (0.82 may
+    # arrive as 0.8200000000000001); any other level still goes to norm.ppf
+    z_score = Z_SCORES.get(round(service_level, 9))
+    if z_score is None:
+        if norm is not None:
+            z_score = norm.ppf(service_level)
+        else:
+            z_score = 1.65  # Default for 95% service level
+    return z_score
 
 
 def calculate_optimal_inventory(forecast_values, confidences, current_stock, lead_time, 
@@ -14,8 +70,8 @@ def calculate_optimal_inventory(forecast_values, confidences, current_stock, lea
     forecast demand, lead time, and desired service level.
     
     Args:
-        forecast_values: List of forecasted demand values
-        confidences: List of confidence intervals
+        forecast_values: Sequence or array of forecasted demand values
+        confidences: Sequence or array of confidence intervals
         current_stock: Current inventory level
         lead_time: Supplier lead time in days
         service_level: Target service level (probability of not stocking out)
@@ -23,21 +79,21 @@ def calculate_optimal_inventory(forecast_values, confidences, current_stock, lea
     Returns:
         Dict with inventory recommendations and metrics
     """
+    # Convert once; the reductions below then run as ndarray methods
+    forecast_values = np.asarray(forecast_values, dtype=np.float64)
+    confidences = np.asarray(confidences, dtype=np.float64)
+
     # Calculate demand statistics
-    total_demand = sum(forecast_values)
+    total_demand = float(forecast_values.sum())
     daily_demand = total_demand / len(forecast_values)
-    forecast_std = np.std(forecast_values)
+    forecast_std = forecast_values.std()
     
     # Lead time demand
     lead_time_demand = daily_demand * lead_time
     lead_time_variance = forecast_std * np.sqrt(lead_time)
 
     # Calculate z-score for service level
-    try:
-        from scipy.stats import norm
-        z_score = norm.ppf(service_level)
-    except ImportError:
-        z_score = 1.65  # Default for 95% service level
+    z_score = _z_score(service_level)
 
     # Safety stock calculation
     safety_stock = z_score * lead_time_variance
@@ -62,15 +118,92 @@ def calculate_optimal_inventory(forecast_values, confidences, current_stock, lea
     # Days until stockout
     days_until_stockout = round(stock_position / daily_demand, 1) if daily_demand > 0 else 999
 
+    # Round the integer outputs together (np.rint rounds half to even, like round())
+    reorder_point, order_quantity, safety_stock, total_forecast, buffer_pct = np.rint(
+        [reorder_point, order_quantity, safety_stock, total_demand, dynamic_buffer * 100]
+    ).astype(int).tolist()
+
     return {
-        'reorder_point': round(reorder_point),
-        'order_quantity': round(order_quantity),
-        'safety_stock': round(safety_stock),
+        'reorder_point': reorder_point,
+        'order_quantity': order_quantity,
+        'safety_stock': safety_stock,
         'should_order': should_order,
         'daily_demand': round(daily_demand, 1),
-        'total_forecast': round(total_demand),
-        'dynamic_buffer': round(dynamic_buffer * 100),
+        'total_forecast': total_forecast,
+        'dynamic_buffer': buffer_pct,
         'stock_position': stock_position,
         'days_until_stockout': days_until_stockout,
-        'confidence_interval': round(np.mean(confidences), 1)
+        'confidence_interval': round(confidences.mean(), 1)
     }
+
+
+def calculate_optimal_inventory_batch(forecast_matrix, confidence_matrix, current_stocks, lead_times,
+                                      service_level=0.95, index=None):
+    """
+    Inventory optimization for many products in one vectorized pass
+
+    Equivalent to calling calculate_optimal_inventory once per row, but
+    every product's statistics and decisions are computed together as
+    column arrays instead of one call each.
+
+    Args:
+        forecast_matrix: (products, days) array of forecasted demand
+        confidence_matrix: (products, days) array of confidence intervals
+        current_stocks: Current inventory level, per product or one for all
+        lead_times: Supplier lead time in days, per product or one for all
+        service_level: Target service level (probability of not stocking out)
+        index: Optional labels for the rows, such as the product ids
+
+    Returns:
+        DataFrame with one row per product and the same columns as the
+        keys of calculate_optimal_inventory's dict
+    """
+    forecasts = np.asarray(forecast_matrix, dtype=np.float64)
+    confidences = np.asarray(confidence_matrix, dtype=np.float64)
+    n = forecasts.shape[0]
+    stock_position = np.broadcast_to(np.asarray(current_stocks), (n,))
+    lead_times = np.broadcast_to(np.asarray(lead_times, dtype=np.float64), (n,))
+
+    # Demand statistics per product
+    total_demand = forecasts.sum(axis=1)
+    daily_demand = total_demand / forecasts.shape[1]
+    forecast_std = forecasts.std(axis=1)
+    has_demand = daily_demand > 0
+
+    # Lead time demand, safety stock and reorder point
+    lead_time_demand = daily_demand * lead_times
+    safety_stock = _z_score(service_level) * forecast_std * np.sqrt(lead_times)
+    reorder_point = lead_time_demand + safety_stock
+
+    # Dynamic buffer based on coefficient of variation
+    cv = np.divide(forecast_std, daily_demand, out=np.zeros(n), where=has_demand)
+    dynamic_buffer = np.clip(cv * 0.5, 0.15, 0.35)
+
+    # Order enough to cover lead time demand + 1 week buffer
+    should_order = stock_position <= reorder_point
+    order_quantity = np.where(should_order, (reorder_point - stock_position) + daily_demand * 7, 0.0)
+
+    # Days until stockout
+    days_until_stockout = np.where(
+        has_demand,
+        np.round(np.divide(stock_position, daily_demand, out=np.zeros(n), where=has_demand), 1),
+        999
+    )
+
+    # Round the integer outputs together, as the scalar version does
+    reorder_point, order_quantity, safety_stock, total_forecast, buffer_pct = np.rint(
+        [reorder_point, order_quantity, safety_stock, total_demand, dynamic_buffer * 100]
+    ).astype(int)
+
+    return pd.DataFrame({
+        'reorder_point': reorder_point,
+        'order_quantity': order_quantity,
+        'safety_stock': safety_stock,
+        'should_order': should_order,
+        'daily_demand': np.round(daily_demand, 1),
+        'total_forecast': total_forecast,
+        'dynamic_buffer': buffer_pct,
+        'stock_position': stock_position,
+        'days_until_stockout': days_until_stockout,
+        'confidence_interval': np.round(confidences.mean(axis=1), 1)
+    }, index=index)
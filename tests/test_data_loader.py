@@ -0,0 +1,114 @@
+"""
+Regression tests for CSV uploads through load_and_validate_data
+"""
+
+import io
+
+import pandas as pd
+import pytest
+
+import utils.data_loader as data_loader
+from utils.data_loader import load_and_validate_data
+
+HEADER = "date,product_id,units_sold\n"
+
+
+@pytest.fixture(params=['polars', 'pandas'])
+def reader(request, monkeypatch):
+    """Run each test with Polars and with the pandas-only fallback"""
+    if request.param == 'polars':
+        if data_loader.pl is None:
+            pytest.skip("polars is not installed")
+    else:
+        monkeypatch.setattr(data_loader, 'pl', None)
+        monkeypatch.setattr(data_loader, '_RETRY_CSV_ERRORS', (pd.errors.ParserError,))
+    return request.param
+
+
+@pytest.fixture
+def errors(monkeypatch):
+    """Messages passed to st.error during the test"""
+    messages = []
+    monkeypatch.setattr(data_loader.st, 'error', messages.append)
+    return messages
+
+
+def load(text):
+    return load_and_validate_data(io.BytesIO(text.encode()))
+
+
+def test_us_format_dates_keep_every_row(reader, errors):
+    rows = "".join(f"01/{day:02d}/2024,P1,{day}\n" for day in range(1, 32))
+    df = load(HEADER + rows)
+
+    assert len(df) == 31
+    assert df['date'].min() == pd.Timestamp('2024-01-01')
+    assert df['date'].max() == pd.Timestamp('2024-01-31')
+    assert df['units_sold'].tolist() == list(range(1, 32))
+    assert errors == []
+
+
+def test_date_column_without_valid_values_is_coerced(reader, errors):
+    df = load(HEADER + "foo,P1,3\nbar,P1,4\n")
+
+    assert df is not None
+    assert df.empty
+    assert errors == []
+
+
+def test_short_ragged_rows_are_padded(reader, errors):
+    df = load(HEADER + "2024-01-01,P1,3\n2024-01-02,P1\n")
+
+    assert df['units_sold'].tolist() == [3, 0]
+    assert errors == []
+
+
+def test_long_ragged_rows_are_reported(reader, errors):
+    df = load(HEADER + "2024-01-01,P1,3\n2024-01-02,P1,4,9\n")
+
+    assert df is None
+    assert len(errors) == 1
+    assert "Error tokenizing data" in errors[0]
+
+
+def test_timezone_aware_dates_load_as_naive_utc(reader, errors):
+    df = load(HEADER + "2024-01-01T00:00:00+00:00,P1,3\n2024-01-02T00:00:00+00:00,P1,4\n")
+
+    assert df['date'].dtype == 'datetime64[s]'
+    assert df['date'].tolist() == [pd.Timestamp('2024-01-01'), pd.Timestamp('2024-01-02')]
+    assert errors == []
+
+
+def test_mixed_timezone_offsets_are_converted_to_utc(reader, errors):
+    df = load(HEADER + "2024-01-01T00:00:00+00:00,P1,3\n2024-01-02T00:00:00+05:30,P1,4\n")
+
+    assert df['date'].tolist() == [pd.Timestamp('2024-01-01 00:00'), pd.Timestamp('2024-01-01 18:30')]
+    assert errors == []
+
+
+def test_reader_parsed_timezone_dates_are_not_parsed_again(monkeypatch, errors):
+    # Arrow's reader types offset timestamps itself, so the loader only has
+    # to drop the timezone
+    if data_loader._PANDAS_CSV_ENGINE != 'pyarrow':
+        pytest.skip("pyarrow is not installed")
+    monkeypatch.setattr(data_loader, 'pl', None)
+    monkeypatch.setattr(data_loader, '_RETRY_CSV_ERRORS', (pd.errors.ParserError,))
+    parsed = []
+    to_datetime = pd.to_datetime
+    monkeypatch.setattr(pd, 'to_datetime', lambda *args, **kwargs: parsed.append(args) or to_datetime(*args, **kwargs))
+
+    df = load(HEADER + "2024-01-01T00:00:00+00:00,P1,3\n2024-01-02T00:00:00+05:30,P1,4\n")
+
+    assert parsed == []
+    assert df['date'].dtype == 'datetime64[s]'
+    assert df['date'].tolist() == [pd.Timestamp('2024-01-01 00:00'), pd.Timestamp('2024-01-01 18:30')]
+
+
+@pytest.mark.parametrize('na', ['NA', 'N/A', 'null', 'NULL', 'NaN', 'None', '#N/A', ''])
+def test_na_strings_are_missing_values(reader, errors, na):
+    df = load(HEADER + f"2024-01-01,P1,3\n2024-01-02,{na},4\n{na},P1,5\n2024-01-03,P1,{na}\n")
+
+    assert df['product_id'].cat.categories.tolist() == ['P1']
+    assert df['date'].tolist() == [pd.Timestamp(f'2024-01-0{day}') for day in (1, 2, 3)]
+    assert df['units_sold'].tolist() == [3, 4, 0]
+    assert errors == []
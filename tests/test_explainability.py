@@ -0,0 +1,16 @@
+"""
+The plain-text insight templates must read like their HTML cards
+"""
+
+import re
+
+import pytest
+
+from models.explainability import INSIGHT_TEMPLATES
+
+
+@pytest.mark.parametrize('key', sorted(INSIGHT_TEMPLATES))
+def test_text_is_the_card_without_markup(key):
+    html, text = INSIGHT_TEMPLATES[key]
+
+    assert re.sub(r'<.*?>', '', html).strip() == text
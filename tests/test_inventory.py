@@ -0,0 +1,62 @@
+"""
+calculate_optimal_inventory_batch must agree with the per-product function
+"""
+
+import numpy as np
+import pytest
+
+from models.inventory import calculate_optimal_inventory, calculate_optimal_inventory_batch
+
+
+def assert_rows_match(batch, forecasts, confidences, stocks, lead_times, service_level):
+    n = len(forecasts)
+    stocks = np.broadcast_to(stocks, (n,))
+    lead_times = np.broadcast_to(lead_times, (n,))
+    for i in range(n):
+        expected = calculate_optimal_inventory(
+            forecasts[i], confidences[i], stocks[i], lead_times[i], service_level
+        )
+        assert batch.iloc[i].to_dict() == expected, f"row {i}"
+
+
+@pytest.fixture
+def inputs():
+    rng = np.random.default_rng(0)
+    forecasts = rng.uniform(0, 40, (50, 14))
+    forecasts[3] = 0  # No expected demand at all
+    confidences = rng.uniform(1, 9, (50, 14))
+    stocks = rng.integers(0, 400, 50)
+    lead_times = rng.integers(1, 20, 50)
+    return forecasts, confidences, stocks, lead_times
+
+
+@pytest.mark.parametrize('service_level', [0.95, 0.9504])
+def test_per_product_stocks_and_lead_times(inputs, service_level):
+    forecasts, confidences, stocks, lead_times = inputs
+    batch = calculate_optimal_inventory_batch(forecasts, confidences, stocks, lead_times, service_level)
+
+    assert_rows_match(batch, forecasts, confidences, stocks, lead_times, service_level)
+
+
+def test_zero_demand_row(inputs):
+    forecasts, confidences, stocks, lead_times = inputs
+    row = calculate_optimal_inventory_batch(forecasts, confidences, stocks, lead_times).iloc[3]
+
+    assert row['daily_demand'] == 0
+    assert row['days_until_stockout'] == 999
+    assert row['dynamic_buffer'] == 15
+
+
+def test_scalar_stock_and_lead_time_broadcast(inputs):
+    forecasts, confidences, _, _ = inputs
+    batch = calculate_optimal_inventory_batch(forecasts, confidences, 100, 7, 0.9)
+
+    assert_rows_match(batch, forecasts, confidences, 100, 7, 0.9)
+
+
+def test_index_labels_rows(inputs):
+    forecasts, confidences, stocks, lead_times = inputs
+    labels = [f'PROD-{i:03d}' for i in range(len(forecasts))]
+    batch = calculate_optimal_inventory_batch(forecasts, confidences, stocks, lead_times, index=labels)
+
+    assert batch.index.tolist() == labels
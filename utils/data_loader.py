@@ -2,17 +2,71 @@
 Data loading and validation module
 """
 
+import io
 import streamlit as st
 import pandas as pd
+import numpy as np
 from data.sample_generator import generate_sample_data
 
+try:
+    import polars as pl
+    _EMPTY_CSV_ERRORS = (pd.errors.EmptyDataError, pl.exceptions.NoDataError)
+    _RETRY_CSV_ERRORS = (pd.errors.ParserError, pl.exceptions.ComputeError)
+except ImportError:
+    pl = None
+    _EMPTY_CSV_ERRORS = (pd.errors.EmptyDataError,)
+    _RETRY_CSV_ERRORS = (pd.errors.ParserError,)
+
+# pandas' default NA strings, handed to Polars so both readers null the same cells
+_CSV_NA_VALUES = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+]
+
+try:
+    import pyarrow  # noqa: F401
+    # Without Polars, pandas can still hand parsing to Arrow's threaded reader
+    _PANDAS_CSV_ENGINE = 'pyarrow'
+except ImportError:
+    _PANDAS_CSV_ENGINE = 'c'
+
+
+def _read_csv(uploaded_file):
+    """
+    Parse an uploaded CSV, using Polars' multithreaded reader when available
+    and otherwise pandas with the PyArrow engine if installed.
+
+    Only tokenizing is handed to the faster readers. Dates are left as text
+    and converted by the loader with pd.to_datetime, which infers US and ISO
+    formats alike, and files the fast readers reject are retried with the
+    pandas C parser so ragged rows get its handling.
+
+    Args:
+        uploaded_file: Streamlit UploadedFile object
+
+    Returns:
+        pandas DataFrame with normalized column names
+    """
+    try:
+        if pl is not None:
+            df = pl.read_csv(io.BytesIO(uploaded_file.getvalue()), null_values=_CSV_NA_VALUES).to_pandas()
+        else:
+            df = pd.read_csv(uploaded_file, engine=_PANDAS_CSV_ENGINE)
+    except _RETRY_CSV_ERRORS:
+        # Arrow and Polars reject ragged rows and blank files that the C
+        # parser pads with NaN or reports as empty, so retry with the C parser
+        uploaded_file.seek(0)
+        df = pd.read_csv(uploaded_file)
+    df.columns = df.columns.str.strip().str.lower()
+    return df
+
 
 def load_and_validate_data(uploaded_file=None):
     """
     Load CSV file or generate sample data, then validate and clean it.
 
     Args:
-        uploaded_file: Streamlit UploadedFile object or None
+        uploaded_file: Streamlit UploadedFile (or any BytesIO) or None
 
     Returns:
         Cleaned DataFrame or None on failure
@@ -23,23 +77,20 @@ def load_and_validate_data(uploaded_file=None):
             uploaded_file.seek(0)
 
             # Check file size
-            if uploaded_file.size == 0:
+            if uploaded_file.getbuffer().nbytes == 0:
                 st.error("❌ Uploaded file is empty.")
                 return None
 
-            # Read CSV
-            df = pd.read_csv(uploaded_file)
+            # Read CSV (column names are normalized by the reader)
+            df = _read_csv(uploaded_file)
 
             if df.empty:
                 st.error("❌ Uploaded CSV contains no data.")
                 return None
 
-            # Normalize column names — strip whitespace and lowercase
-            df.columns = df.columns.str.strip().str.lower()
-
             st.sidebar.success("✅ File uploaded successfully!")
 
-        except pd.errors.EmptyDataError:
+        except _EMPTY_CSV_ERRORS:
             st.error("❌ The file is empty or invalid CSV format.")
             return None
 
@@ -53,7 +104,7 @@ def load_and_validate_data(uploaded_file=None):
 
     # Validate required columns
     required_cols = ['date', 'product_id', 'units_sold']
-    missing = [col for col in required_cols if col not in df.columns]
+    missing = sorted(set(required_cols) - set(df.columns))
 
     if missing:
         st.error(
@@ -62,10 +113,60 @@ def load_and_validate_data(uploaded_file=None):
         )
         return None
 
-    # Convert data types safely
-    df['date'] = pd.to_datetime(df['date'], errors='coerce')
-    df = df.dropna(subset=['date'])
-    df['units_sold'] = pd.to_numeric(df['units_sold'], errors='coerce').fillna(0)
-    df = df.sort_values(['product_id', 'date']).reset_index(drop=True)
+    # Parsers and the sample generator usually deliver typed columns already,
+    # so coercion passes run only for the dtypes that need them
+    units = df['units_sold']
+    if not pd.api.types.is_numeric_dtype(units):
+        units = pd.to_numeric(units, errors='coerce')
+    if not pd.api.types.is_integer_dtype(units):
+        units = units.fillna(0).round()
+    if units.abs().max() > np.iinfo(np.int32).max:
+        st.error("❌ units_sold values are too large to process.")
+        return None
 
+    # Convert data types safely — categorical product_id keeps per-product
+    # filtering on integer codes instead of Python strings, and int32 units
+    # plus second-resolution dates halve the bytes every scan touches
+    # Offsets are resolved to UTC and then dropped, since timezone-aware
+    # values cannot be cast to the naive second-resolution dtype
+    dates = df['date']
+    if isinstance(dates.dtype, pd.DatetimeTZDtype):
+        # Already parsed by the reader; only the timezone has to go
+        dates = dates.dt.tz_convert(None)
+    elif not pd.api.types.is_datetime64_dtype(dates):
+        # utc=True also accepts a mix of offsets, which would otherwise raise
+        dates = pd.to_datetime(dates, errors='coerce', utc=True, cache=True).dt.tz_convert(None)
+    df['date'] = dates.astype('datetime64[s]')
+    df['product_id'] = df['product_id'].astype('category')
+    df['units_sold'] = units.astype('int32')
+
+    df = df.dropna(subset=['date'])
+    if df['date'].is_monotonic_increasing:
+        # Uploads exported in date order skip the sort, which would leave
+        # already sorted rows as they are. The sample generator lays rows out
+        # product by product, so the demo data always takes the sort below
+        df = df.reset_index(drop=True)
+    else:
+        # Stable sort keeps each product's rows in date order
+        df = df.sort_values('date', kind='stable', ignore_index=True)
+    # Products whose only rows had unparseable dates must not stay selectable
+    df['product_id'] = df['product_id'].cat.remove_unused_categories()
+    # Weekday derived once here so charts and insights never re-parse dates
+    df['day_of_week'] = df['date'].dt.dayofweek.astype('int8')
     return df
+
+
+def get_product_groups(df):
+    """
+    Map each product_id to the row positions of its sales history.
+
+    Computed once per load alongside the frame, so selecting a product is a
+    positional lookup instead of a full-frame equality scan on every rerun.
+
+    Args:
+        df: Cleaned DataFrame from load_and_validate_data
+
+    Returns:
+        Dict of product_id -> integer position array
+    """
+    return df.groupby('product_id', observed=True, sort=False).indices
@@ -2,6 +2,8 @@
 Helper utility functions
 """
 
+import numpy as np
+
 
 def format_number(num, decimals=0):
     """Format number with thousand separators"""
@@ -12,20 +14,38 @@ def format_number(num, decimals=0):
 
 
 def calculate_percentage_change(current, previous):
-    """Calculate percentage change between two values"""
+    """
+    Calculate percentage change between two values
+
+    Arrays are handled element-wise in one pass, with 0 wherever the
+    previous value is 0.
+    """
+    if np.ndim(current) or np.ndim(previous):
+        current = np.asarray(current, dtype=np.float64)
+        previous = np.asarray(previous, dtype=np.float64)
+        change = np.divide(current - previous, previous,
+                           out=np.zeros(np.broadcast(current, previous).shape), where=previous != 0)
+        return change * 100
     if previous == 0:
         return 0
     return ((current - previous) / previous) * 100
 
 
+# Trend emoji by direction: falling, flat, rising
+TREND_INDICATORS = ("📉", "➡️", "📈")
+
+
 def get_trend_indicator(value):
-    """Get emoji indicator for trend direction"""
-    if value > 15:
-        return "📈"
-    elif value < -15:
-        return "📉"
-    else:
-        return "➡️"
+    """
+    Get emoji indicator for trend direction
+
+    Moves beyond ±15 pick the rising or falling indicator by index rather
+    than a branch chain. An array of values gives an array of indicators.
+    """
+    if np.ndim(value):
+        value = np.asarray(value)
+        return np.take(TREND_INDICATORS, (value > 15).astype(np.intp) - (value < -15) + 1)
+    return TREND_INDICATORS[int(value > 15) - int(value < -15) + 1]
 
 
 def get_badge_class(value, thresholds):
@@ -33,9 +53,17 @@ def get_badge_class(value, thresholds):
     Get CSS badge class based on value and thresholds
     
     Args:
-        value: The value to evaluate
+        value: The value to evaluate, or an array of values to classify
+            element-wise in one pass
         thresholds: Dict with 'danger', 'warning', 'success' keys
     """
+    if np.ndim(value):
+        value = np.asarray(value)
+        return np.select(
+            [value <= thresholds.get('danger', float('-inf')), value <= thresholds.get('warning', float('-inf'))],
+            ['badge-danger', 'badge-warning'],
+            default='badge-success'
+        )
     if value <= thresholds.get('danger', float('-inf')):
         return 'badge-danger'
     elif value <= thresholds.get('warning', float('-inf')):